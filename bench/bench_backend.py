@@ -0,0 +1,94 @@
+"""
+对比ItvSet各个后端(treap, avl)的构建、修改和查询
+每项给出最好的一次耗时，随机数种子固定
+
+python bench/bench_backend.py [n ...]
+"""
+
+import random
+import sys
+import time
+
+from icl import *
+
+
+def _timeit(f, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        t = time.perf_counter()
+        f()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def _random_ops(n, m, seed):
+    """
+    端点范围与集合中的区间相当，插入的区间长度与间隔相当
+    """
+    rnd = random.Random(seed)
+    hi = 4 * n
+    itvs = []
+    for _ in range(m):
+        a = rnd.randrange(hi)
+        itvs.append(Itv(a, a + rnd.randrange(1, 4)))
+    points = [rnd.random() * hi for _ in range(m)]
+    return itvs, points
+
+
+def bench(backend, n, m=10 ** 4):
+    itvs = [Itv(4 * i, 4 * i + 2) for i in range(n)]
+    adds, points = _random_ops(n, m, 1)
+    removes, _ = _random_ops(n, m, 2)
+    window = Itv(n, 3 * n)
+    set_default_backend(backend)
+    base = ItvSet.from_sorted(itvs)
+    res = {'height': base._root.height()}
+
+    res['build'] = _timeit(lambda: ItvSet.from_sorted(itvs))
+
+    def seq_add():
+        s = ItvSet()
+        for v in itvs[:m]:
+            s.add(v)
+        res['seq_height'] = s._root.height()
+    res['seq_add'] = _timeit(seq_add)
+
+    def rand_add():
+        s = base.copy()
+        for v in adds:
+            s.add(v)
+    res['rand_add'] = _timeit(rand_add)
+
+    def rand_remove():
+        s = base.copy()
+        for v in removes:
+            s.remove(v)
+    res['rand_remove'] = _timeit(rand_remove)
+
+    def contains():
+        for p in points:
+            p in base
+    res['contains'] = _timeit(contains)
+
+    def overlapping():
+        for _ in base.overlapping(window):
+            pass
+    res['overlapping'] = _timeit(overlapping)
+    return res
+
+
+def main(*ns):
+    ns = ns or (10 ** 3, 10 ** 4, 10 ** 5)
+    random.seed(2333)
+    print(f'{"n":>8} {"backend":>8} {"height":>6} {"seq_h":>6} {"build":>8} {"seq_add":>8} '
+          f'{"add":>8} {"remove":>8} {"contains":>8} {"overlap":>8}')
+    for n in ns:
+        for backend in ('treap', 'avl'):
+            r = bench(backend, n)
+            print(f'{n:>8} {backend:>8} {r["height"]:>6} {r["seq_height"]:>6} {r["build"]:>8.3f} '
+                  f'{r["seq_add"]:>8.3f} {r["rand_add"]:>8.3f} {r["rand_remove"]:>8.3f} '
+                  f'{r["contains"]:>8.3f} {r["overlapping"]:>8.3f}')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
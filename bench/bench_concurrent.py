@@ -0,0 +1,102 @@
+"""
+一个写线程与多个读线程共享集合时的吞吐量
+对比全局锁保护的ItvSet(读写都加锁)和ConcurrentItvSet(只有写加锁)
+读线程交替做点查询和局部遍历，写线程不停地add/remove
+
+python bench/bench_concurrent.py [n] [seconds]
+"""
+
+import random
+import sys
+import threading
+import time
+
+from icl import *
+
+_READERS = (1, 2, 4, 8)
+
+
+class _LockedItvSet:
+    """
+    基线：所有操作都持有同一把锁
+    """
+
+    def __init__(self, iterable):
+        self._set = ItvSet(iterable)
+        self._lock = threading.Lock()
+
+    def add(self, itv):
+        with self._lock:
+            self._set.add(itv)
+
+    def remove(self, itv):
+        with self._lock:
+            self._set.remove(itv)
+
+    def __contains__(self, x):
+        with self._lock:
+            return x in self._set
+
+    def overlapping(self, itv):
+        with self._lock:
+            return list(self._set.overlapping(itv))
+
+
+def _run(s, n, readers, seconds):
+    """
+    返回(每秒读操作数, 每秒写操作数)
+    """
+    stop = threading.Event()
+    reads = [0] * readers
+    writes = [0]
+
+    def writer():
+        rnd = random.Random(1)
+        cnt = 0
+        while not stop.is_set():
+            a = rnd.randrange(4 * n)
+            v = Itv(a, a + rnd.randrange(1, 4))
+            if cnt & 1:
+                s.remove(v)
+            else:
+                s.add(v)
+            cnt += 1
+        writes[0] = cnt
+
+    def reader(k):
+        rnd = random.Random(k + 2)
+        cnt = 0
+        while not stop.is_set():
+            x = rnd.random() * 4 * n
+            if cnt % 8:
+                x in s
+            else:
+                for _ in s.overlapping(Itv(x, x + 40)):
+                    pass
+            cnt += 1
+        reads[k] = cnt
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader, args=(k,)) for k in range(readers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return sum(reads) / seconds, writes[0] / seconds
+
+
+def main(n=10 ** 5, seconds=2.0):
+    itvs = [Itv(4 * i, 4 * i + 2) for i in range(n)]
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f'n = {n}, {seconds}s per case, gil = {gil}')
+    print(f'{"readers":>8} {"impl":>12} {"reads/s":>12} {"writes/s":>12}')
+    for readers in _READERS:
+        for name, create in (('locked', _LockedItvSet), ('concurrent', ConcurrentItvSet)):
+            r, w = _run(create(itvs), n, readers, seconds)
+            print(f'{readers:>8} {name:>12} {r:>12.0f} {w:>12.0f}', flush=True)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 10 ** 5, float(args[1]) if len(args) > 1 else 2.0)
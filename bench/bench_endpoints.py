@@ -0,0 +1,90 @@
+"""
+端点比较相关热点的微基准：Itv的判定，ItvSet的add和__contains__
+分为有限端点和含无穷端点两种数据，每项给出每次操作的纳秒数
+
+python bench/bench_endpoints.py [n]
+"""
+
+import random
+import sys
+import time
+
+from icl import *
+
+
+def _per_op(f, m, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        t = time.perf_counter()
+        f()
+        best = min(best, time.perf_counter() - t)
+    return best / m * 1e9
+
+
+def _itvs(n, unbounded):
+    """
+    n个互不相交的区间，端点开闭随机，unbounded为True时首尾两个区间延伸到无穷
+    """
+    rnd = random.Random(1)
+    kinds = ['()', '(]', '[)', '[]']
+    res = [Itv(4 * i, 4 * i + 2, rnd.choice(kinds)) for i in range(n)]
+    if unbounded:
+        res[0] = Itv(-inf, 2, '()')
+        res[-1] = Itv(4 * n - 4, inf, '[)')
+    return res
+
+
+def bench(n, unbounded, m=10 ** 5):
+    itvs = _itvs(n, unbounded)
+    rnd = random.Random(2)
+    # 一半的点恰好落在端点上，需要区分开闭
+    points = [rnd.randrange(4 * n) if rnd.random() < 0.5 else rnd.random() * 4 * n for _ in range(m)]
+    ops = []
+    for _ in range(m // 10):
+        a = rnd.randrange(4 * n)
+        ops.append(Itv(a, a + rnd.randrange(1, 4), rnd.choice(['[]', '()'])))
+    s = ItvSet(itvs, seed=3)
+    v, w = itvs[0], itvs[-1]
+    res = {}
+
+    def itv_contains():
+        for p in points:
+            p in v
+            p in w
+    res['Itv.__contains__'] = _per_op(itv_contains, 2 * m)
+
+    def itv_intersect():
+        for u in ops:
+            u.intersect(v)
+            u.intersect_or_near(w)
+    res['Itv.intersect'] = _per_op(itv_intersect, 2 * len(ops))
+
+    def contains():
+        for p in points:
+            p in s
+    res['ItvSet.__contains__'] = _per_op(contains, m)
+
+    def add():
+        c = s.copy()
+        for u in ops:
+            c.add(u)
+    res['ItvSet.add'] = _per_op(add, len(ops))
+
+    def remove():
+        c = s.copy()
+        for u in ops:
+            c.remove(u)
+    res['ItvSet.remove'] = _per_op(remove, len(ops))
+    return res
+
+
+def main(n=10 ** 5):
+    print(f'n = {n}, ns per op')
+    for unbounded in (False, True):
+        print('unbounded' if unbounded else 'bounded')
+        for k, t in bench(n, unbounded).items():
+            print(f'  {k:>20} {t:>10.0f}')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,51 @@
+"""
+ItvSet完整遍历的吞吐量
+对比递归生成器(旧实现)和显式栈(当前实现)
+
+python bench/bench_iter.py [n]
+"""
+
+import random
+import sys
+import time
+
+from icl import *
+
+
+def _recursive_abc_order_iter(n):
+    if n is None:
+        return
+    yield from _recursive_abc_order_iter(n.lch)
+    yield n
+    yield from _recursive_abc_order_iter(n.rch)
+
+
+def _timeit(f, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        t = time.perf_counter()
+        f()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def main(n=10 ** 6):
+    random.seed(2333)
+    s = ItvSet.from_sorted(Itv(2 * i, 2 * i + 1) for i in range(n))
+    print(f'n = {n}, height = {s._root.height()}')
+
+    def old():
+        for _ in _recursive_abc_order_iter(s._root):
+            pass
+
+    def new():
+        for _ in s:
+            pass
+
+    for name, f in [('recursive', old), ('stack', new)]:
+        t = _timeit(f)
+        print(f'{name:>10}: {t:.3f}s  {n / t / 1e6:.2f}M itv/s')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,45 @@
+"""
+每个Itv占用的内存
+对比基于__dict__的旧布局和基于__slots__的当前实现
+
+python bench/bench_itv_memory.py [n]
+"""
+
+import sys
+import tracemalloc
+
+from icl import *
+
+
+class _DictItv:
+    """
+    旧的Itv布局，每个实例带有__dict__
+    """
+
+    def __init__(self, a, b, kind='[]'):
+        self.a = a
+        self.b = b
+        self.left_open = kind[0] == '('
+        self.right_open = kind[1] == ')'
+
+
+def _measure(cls, n):
+    # 端点对象提前创建并复用，避免把端点本身算进去
+    points = list(range(512))
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    itvs = [cls(points[i & 255], points[256 + (i & 255)], '[)') for i in range(n)]
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del itvs
+    return used / n
+
+
+def main(n=10 ** 6):
+    print(f'n = {n}')
+    for name, cls in [('__dict__', _DictItv), ('__slots__', Itv)]:
+        print(f'{name:>10}: {_measure(cls, n):.1f} bytes/itv')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,46 @@
+"""
+ItvMultiSet的点查询和区间查询，与逐个扫描全部区间对比
+每项给出每次操作的微秒数
+
+python bench/bench_multiset.py [n]
+"""
+
+import random
+import sys
+import time
+
+from icl import *
+
+
+def _per_op(f, m):
+    t = time.perf_counter()
+    f()
+    return (time.perf_counter() - t) / m * 1e6
+
+
+def main(n=10 ** 5):
+    rnd = random.Random(1)
+    # 长度服从指数分布，大部分区间很短，少数很长
+    itvs = []
+    for _ in range(n):
+        a = rnd.random() * n
+        itvs.append(Itv(a, a + rnd.expovariate(0.5)))
+    s = ItvMultiSet(itvs, seed=2)
+    points = [rnd.random() * n for _ in range(1000)]
+    windows = [Itv(x, x + 10) for x in points]
+
+    print(f'n = {n}, us per op')
+    res = {
+        'add': _per_op(lambda: [s.copy().add(v) for v in windows], len(windows)),
+        'remove': _per_op(lambda: [s.copy().discard(v) for v in itvs[:1000]], 1000),
+        'stab': _per_op(lambda: [list(s.stab(x)) for x in points], len(points)),
+        'stab (scan)': _per_op(lambda: [[v for v in itvs if x in v] for x in points[:20]], 20),
+        'overlapping': _per_op(lambda: [list(s.overlapping(w)) for w in windows], len(windows)),
+        'overlapping (scan)': _per_op(lambda: [[v for v in itvs if v.intersect(w)] for w in windows[:20]], 20),
+    }
+    for k, t in res.items():
+        print(f'  {k:>20} {t:>10.1f}')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,243 @@
+"""
+Itv和ItvSet热点路径的基准测试
+每个规模、每个后端各运行一遍，结果写入json，便于比较不同版本
+
+python bench/run.py                         # 10^3 ~ 10^6，结果写入bench/results.json
+python bench/run.py -n 1000 10000 -o a.json
+python bench/run.py --compare a.json b.json # 对比两次结果
+
+所有随机数据和treap的优先级都由固定的种子生成，同一版本多次运行的结果只受计时噪声影响
+未指定种子的集合使用模块内固定种子的随机序列，同样可以复现
+"""
+
+import argparse
+import json
+import pickle
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from icl import *
+
+_DEFAULT_SIZES = (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6)
+_DEFAULT_OUTPUT = Path(__file__).with_name('results.json')
+
+# 单点操作(add, remove, contains)和批量操作的区间数上限
+_MAX_OPS = 10 ** 4
+# copy的次数
+_COPIES = 1000
+# k路并集的集合数
+_PARTS = 64
+
+
+def _timeit(f, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t = time.perf_counter()
+        f()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def _random_itvs(n, seed):
+    """
+    n个互不相交的随机区间，端点在[0, 10n)内，开闭随机
+    """
+    rnd = random.Random(seed)
+    points = sorted(rnd.sample(range(10 * n), 2 * n))
+    kinds = ['()', '(]', '[)', '[]']
+    return [Itv(points[i], points[i + 1], rnd.choice(kinds)) for i in range(0, 2 * n, 2)]
+
+
+def _random_ops(n, m, seed):
+    """
+    m个长度与间隔相当的随机区间
+    """
+    rnd = random.Random(seed)
+    res = []
+    for _ in range(m):
+        a = rnd.randrange(10 * n)
+        res.append(Itv(a, a + rnd.randrange(1, 10)))
+    return res
+
+
+def _build(itvs, seed):
+    return ItvSet(itvs, seed=seed)
+
+
+def _peak_memory(itvs, seed):
+    """
+    构建过程中的内存峰值，区间本身已经存在，不计入
+    """
+    tracemalloc.start()
+    try:
+        s = _build(itvs, seed)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak, s
+
+
+def bench(n, backend, repeat=3):
+    """
+    返回一个规模、一个后端下的结果
+    """
+    set_default_backend(backend)
+    m = min(n, _MAX_OPS)
+    itvs = _random_itvs(n, 1)
+    others = _random_itvs(n, 2)
+    ops = _random_ops(n, m, 3)
+    rnd = random.Random(4)
+    points = [rnd.random() * 10 * n for _ in range(m)]
+    shuffled = itvs[:]
+    random.Random(5).shuffle(shuffled)
+
+    peak, s1 = _peak_memory(shuffled, 6)
+    s2 = _build(others, 7)
+    times = {}
+    counts = {}
+
+    def run(name, f, count):
+        times[name] = _timeit(f, repeat)
+        counts[name] = count
+
+    run('construct', lambda: _build(shuffled, 6), n)
+    run('from_sorted', lambda: ItvSet.from_sorted(itvs), n)
+
+    def add():
+        s = s1.copy()
+        for v in ops:
+            s.add(v)
+    run('add', add, m)
+
+    def remove():
+        s = s1.copy()
+        for v in ops:
+            s.remove(v)
+    run('remove', remove, m)
+
+    def add_many():
+        s1.copy().add_many(ops)
+    run('add_many', add_many, m)
+
+    def remove_many():
+        s1.copy().remove_many(ops)
+    run('remove_many', remove_many, m)
+
+    def contains():
+        for p in points:
+            p in s1
+    run('contains', contains, m)
+
+    def iterate():
+        for _ in s1:
+            pass
+    run('iter', iterate, n)
+
+    def copy():
+        for _ in range(_COPIES):
+            s1.copy()
+    run('copy', copy, _COPIES)
+
+    run('and', lambda: s1 & s2, 2 * n)
+    run('or', lambda: s1 | s2, 2 * n)
+    run('sub', lambda: s1 - s2, 2 * n)
+
+    parts = [ItvSet.from_sorted(itvs[i::_PARTS]) for i in range(_PARTS)]
+    run('union_k', lambda: ItvSet.union(*parts), n)
+
+    data = pickle.dumps(s1, pickle.HIGHEST_PROTOCOL)
+    run('pickle', lambda: pickle.dumps(s1, pickle.HIGHEST_PROTOCOL), n)
+    run('unpickle', lambda: pickle.loads(data), n)
+
+    return {
+        'n': n,
+        'backend': backend,
+        'height': s1._root.height(),
+        'peak_bytes': peak,
+        'pickle_bytes': len(data),
+        'seconds': times,
+        'ops': counts,
+    }
+
+
+def _git_revision():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                             cwd=Path(__file__).parent, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_result(r):
+    cols = ' '.join(f'{k}={v * 1e3:.2f}ms' for k, v in r['seconds'].items())
+    print(f'n={r["n"]} backend={r["backend"]} height={r["height"]} '
+          f'peak={r["peak_bytes"] / 2 ** 20:.1f}MiB {cols}', flush=True)
+
+
+def run_all(sizes, backends, repeat):
+    results = []
+    for n in sizes:
+        for backend in backends:
+            r = bench(n, backend, repeat)
+            _print_result(r)
+            results.append(r)
+    set_default_backend('treap')
+    return {
+        'meta': {
+            'revision': _git_revision(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare(old_path, new_path):
+    """
+    按(后端, 规模, 测试项)对齐两次结果，打印耗时比值，>1表示变慢
+    """
+    old, new = (json.loads(Path(p).read_text()) for p in (old_path, new_path))
+    old_results = {(r['backend'], r['n']): r for r in old['results']}
+    print(f'{"backend":>8} {"n":>8} {"case":>12} {"old":>10} {"new":>10} {"ratio":>6}')
+    for r in new['results']:
+        o = old_results.get((r['backend'], r['n']))
+        if o is None:
+            continue
+        items = [(k, o['seconds'].get(k), v) for k, v in r['seconds'].items()]
+        items.append(('height', o['height'], r['height']))
+        items.append(('peak_bytes', o['peak_bytes'], r['peak_bytes']))
+        items.append(('pickle_bytes', o.get('pickle_bytes'), r['pickle_bytes']))
+        for case, a, b in items:
+            if a is None:
+                continue
+            ratio = b / a if a else float('inf')
+            print(f'{r["backend"]:>8} {r["n"]:>8} {case:>12} {a:>10.4g} {b:>10.4g} {ratio:>6.2f}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--sizes', type=int, nargs='+', default=_DEFAULT_SIZES)
+    parser.add_argument('-b', '--backends', nargs='+', default=['treap', 'avl'])
+    parser.add_argument('-r', '--repeat', type=int, default=3)
+    parser.add_argument('-o', '--output', type=Path, default=_DEFAULT_OUTPUT)
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'))
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    res = run_all(args.sizes, args.backends, args.repeat)
+    args.output.write_text(json.dumps(res, indent=2))
+    print(f'written to {args.output}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
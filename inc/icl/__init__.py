@@ -1,3 +1,14 @@
 from .inf import *
 from .itv import *
-from .itvset_treap import *     # 暂时使用treap实现，后续考虑用avl实现，avl应当有更高的性能
+from .itvset_treap import *     # 默认使用treap实现，可通过set_default_backend切换
+from .itvset_avl import *
+from .itvset_complement import *
+from .itvset_concurrent import *
+from .itvmap_treap import *
+from .itvmultiset_treap import *
+from .itvset_int import *
+
+try:
+    from .itvset_frozen import *    # 依赖numpy
+except ImportError:
+    pass
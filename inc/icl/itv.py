@@ -7,65 +7,124 @@ __all__ = [
 ]
 
 
-def _left_or_eq_to(a, b, open_a, open_b):
+_FLOAT_INF = float('inf')
+_INF_TYPE = type(inf)
+_NEG_INF = -inf
+_NUMBER_TYPES = frozenset([int, float])
+
+
+def _hash_itv(a, b, flags):
     """
-    a <= b 当两个全是close
-    a < b 其他情况
+    端点可能是inf，它与float('inf')相等但hash不同，无穷统一转为float，保证相等的区间hash相同
+    只用==判断，端点为str、datetime等类型时不会抛出异常
     """
-    if open_a or open_b:
-        return a < b
-    else:
-        return a <= b
+    if a == _FLOAT_INF or a == -_FLOAT_INF:
+        a = float(a)
+    if b == _FLOAT_INF or b == -_FLOAT_INF:
+        b = float(b)
+    return hash((a, b, flags))
+
+
+def _length(a, b):
+    """
+    a <= b时区间的长度b - a，类型与端点之差一致，例如datetime的端点得到timedelta
+    """
+    if type(a) is _INF_TYPE:
+        return -a + b   # infinity中5 - (-inf)的结果为-inf，取负后相加则正确
+    return b - a
 
 
-def _left_or_near_to(a, b, open_a, open_b):
+def _init_itv(itv, a, b, left_open, right_open):
     """
-    a <= b 一个是close
-    a < b 其他情况
+    设置各个slot，并保证空集表示一致
     """
-    if open_a and open_b:
-        return a < b
+    # inf可以与任意类型比较，但比较很慢，另一端为int或float时换成float('inf')
+    if type(a) is _INF_TYPE and type(b) in _NUMBER_TYPES:
+        a = float(a)
+    elif type(b) is _INF_TYPE and type(a) in _NUMBER_TYPES:
+        b = float(b)
+    if a > b or (a == b and (left_open or right_open)):
+        # 方便比较
+        a, b, flags = inf, _NEG_INF, 3
     else:
-        return a <= b
+        flags = (left_open << 1) | right_open
+    _set_a(itv, a)
+    _set_b(itv, b)
+    _set_flags(itv, flags)
 
 
 def _create_itv(a, b, left_open, right_open):
-    itv = Itv.__new__(Itv)
-    itv.a = a
-    itv.b = b
-    itv.left_open = left_open
-    itv.right_open = right_open
-    itv._normalize()
+    itv = _new_itv(Itv)
+    _init_itv(itv, a, b, left_open, right_open)
+    return itv
+
+
+def _create_itv_flags(a, b, flags):
+    """
+    同_create_itv，开闭直接由flags给出
+    """
+    itv = _new_itv(Itv)
+    if type(a) is _INF_TYPE and type(b) in _NUMBER_TYPES:
+        a = float(a)
+    elif type(b) is _INF_TYPE and type(a) in _NUMBER_TYPES:
+        b = float(b)
+    if a > b or (a == b and flags):
+        a, b, flags = inf, _NEG_INF, 3
+    _set_a(itv, a)
+    _set_b(itv, b)
+    _set_flags(itv, flags)
     return itv
 
 
 class Itv:
     """
     Interval
-    应当视为不可变对象，任何属性创建后不应当更改
+    不可变对象，创建后任何属性都不能更改
+    _flags的第1位表示左开，第0位表示右开，比较端点时直接使用，不经过left_open和right_open
+    另一端为int或float时，无穷端点保存为float('inf')，比较走原生浮点路径
     """
 
+    __slots__ = ('a', 'b', '_flags', '_hash')
+
     def __init__(self, a, b, kind='[]'):
         """
         kind表示区间类型, 根据数学上的表示，[]表示闭区间， ()表示开区间
         a,b分别表示左断点和右端点
         """
-        self.a = a
-        self.b = b
-        self.left_open = kind[0] == '('
-        self.right_open = kind[1] == ')'
-        self._normalize()
+        _init_itv(self, a, b, kind[0] == '(', kind[1] == ')')
+
+    def __setattr__(self, key, value):
+        raise AttributeError("'Itv' object is immutable")
+
+    __delattr__ = __setattr__
+
+    def __reduce__(self):
+        return _create_itv, (self.a, self.b, self.left_open, self.right_open)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
     @staticmethod
     def empty_set():
         return Itv(inf, -inf)
 
+    @property
+    def left_open(self) -> bool:
+        return self._flags > 1
+
+    @property
+    def right_open(self) -> bool:
+        return self._flags & 1 == 1
+
     @property
     def kind(self):
         """
         此属性应当只被用作比较，而不应当有其他用途
         """
-        return (self.left_open << 1) + self.right_open
+        return self._flags
 
     def create_like(self, a = None, b = None, left_open = None, right_open = None):
         a = a if a is not None else self.a
@@ -74,58 +133,63 @@ class Itv:
         right_open = right_open if right_open is not None else self.right_open
         return _create_itv(a, b, left_open, right_open)
 
-    def _normalize(self):
-        """
-        保证空集表示一致
-        """
-        if self.a > self.b or \
-                (self.a == self.b and (self.left_open or self.right_open)):
-            # 方便比较
-            self.a = inf
-            self.b = -inf
-            self.left_open = True
-            self.right_open = True
-
     def empty(self):
         return self.a > self.b
 
+    def length(self):
+        """
+        区间长度，空集为0，端点为无穷时为inf
+        端点需要支持减法，只有调用时才要求
+        """
+        a, b = self.a, self.b
+        if a > b:
+            return 0
+        return _length(a, b)
+
     def __contains__(self, x):
         """
         判定某个点是否在区间内
         """
-        return self.right_to_a(x) and self.left_to_b(x)
+        a, b, flags = self.a, self.b, self._flags
+        return (a < x or (a == x and flags < 2)) and (x < b or (x == b and not flags & 1))
 
     def right_to_a(self, x):
         """
         x在a端点的右边
         """
-        if self.left_open:
-            return self.a < x
-        else:
-            return self.a <= x
+        a = self.a
+        return a < x or (a == x and self._flags < 2)
 
     def left_to_b(self, x):
         """
         x在b断点的左边
         """
-        if self.right_open:
-            return self.b > x
-        else:
-            return self.b >= x
+        b = self.b
+        return x < b or (x == b and not self._flags & 1)
 
     def intersect(self, other: 'Itv') -> bool:
         """
         是否相交
+        端点重合时，两侧都闭才相交
         """
-        return _left_or_eq_to(self.a, other.b, self.left_open, other.right_open) \
-            and _left_or_eq_to(other.a, self.b, other.left_open, self.right_open)
+        f1, f2 = self._flags, other._flags
+        a, b = self.a, other.b
+        if not (a < b or (a == b and not (f1 & 2 or f2 & 1))):
+            return False
+        a, b = other.a, self.b
+        return a < b or (a == b and not (f2 & 2 or f1 & 1))
 
     def intersect_or_near(self, other: 'Itv') -> bool:
         """
         是否相交或紧挨着
+        端点重合时，至少一侧闭即可
         """
-        return _left_or_near_to(self.a, other.b, self.left_open, other.right_open) \
-               and _left_or_near_to(other.a, self.b, other.left_open, self.right_open)
+        f1, f2 = self._flags, other._flags
+        a, b = self.a, other.b
+        if not (a < b or (a == b and not (f1 & 2 and f2 & 1))):
+            return False
+        a, b = other.a, self.b
+        return a < b or (a == b and not (f2 & 2 and f1 & 1))
 
     def split(self, x, is_open=False):
         left = _create_itv(self.a, x, self.left_open, is_open)
@@ -142,48 +206,50 @@ class Itv:
         return res
 
     def __and__(self, other: 'Itv') -> 'Itv':
-        a = max(self.a, other.a)
-        b = min(self.b, other.b)
-
-        if a == self.a == other.a:
-            left_open = self.left_open or other.left_open
-        elif a == self.a:
-            left_open = self.left_open
-        else:  # a == x.a:
-            left_open = other.left_open
-
-        if b == self.b == other.b:
-            right_open = self.right_open or other.right_open
-        elif b == self.b:
-            right_open = self.right_open
-        else:  # b == x.b:
-            right_open = other.right_open
-
-        res = _create_itv(a, b, left_open, right_open)
-        return res
+        a1, b1, f1 = self.a, self.b, self._flags
+        a2, b2, f2 = other.a, other.b, other._flags
+
+        # 取较大的下界，相等时有一侧开则开
+        if a1 > a2:
+            a, flags = a1, f1 & 2
+        elif a1 < a2:
+            a, flags = a2, f2 & 2
+        else:
+            a, flags = a1, (f1 | f2) & 2
+
+        # 取较小的上界
+        if b1 < b2:
+            b, flags = b1, flags | f1 & 1
+        elif b1 > b2:
+            b, flags = b2, flags | f2 & 1
+        else:
+            b, flags = b1, flags | (f1 | f2) & 1
+
+        return _create_itv_flags(a, b, flags)
 
     def __or__(self, other: 'Itv'):
         assert self.intersect_or_near(other)
 
-        a = min(self.a, other.a)
-        b = max(self.b, other.b)
+        a1, b1, f1 = self.a, self.b, self._flags
+        a2, b2, f2 = other.a, other.b, other._flags
 
-        if a == self.a == other.a:
-            left_open = self.left_open and other.left_open
-        elif a == self.a:
-            left_open = self.left_open
-        else:  # a == itv.a:
-            left_open = other.left_open
+        # 取较小的下界，相等时两侧都开才开
+        if a1 < a2:
+            a, flags = a1, f1 & 2
+        elif a1 > a2:
+            a, flags = a2, f2 & 2
+        else:
+            a, flags = a1, f1 & f2 & 2
 
-        if b == self.b == other.b:
-            right_open = self.right_open and other.right_open
-        elif b == self.b:
-            right_open = self.right_open
-        else:  # b == itv.b:
-            right_open = other.right_open
+        # 取较大的上界
+        if b1 > b2:
+            b, flags = b1, flags | f1 & 1
+        elif b1 < b2:
+            b, flags = b2, flags | f2 & 1
+        else:
+            b, flags = b1, flags | f1 & f2 & 1
 
-        res = _create_itv(a, b, left_open, right_open)
-        return res
+        return _create_itv_flags(a, b, flags)
 
     __iand__ = __and__
     __ior__ = __or__
@@ -199,34 +265,42 @@ class Itv:
             return self
 
     def __gt__(self, x):
-        if self.left_open:
-            return x <= self.a
-        else:
-            return x < self.a
+        """
+        区间完全在点x右边
+        """
+        a = self.a
+        return x < a or (x == a and self._flags > 1)
 
     def __ge__(self, x):
-        if self.right_open:
-            return x < self.b
-        else:
-            return x <= self.b
+        b = self.b
+        return x < b or (x == b and not self._flags & 1)
 
     def __lt__(self, x):
-        if self.right_open:
-            return x >= self.b
-        else:
-            return x > self.b
+        """
+        区间完全在点x左边
+        """
+        b = self.b
+        return x > b or (x == b and self._flags & 1 == 1)
 
     def __le__(self, x):
-        if self.left_open:
-            return x >= self.a
-        else:
-            return x > self.a
+        a = self.a
+        return x > a or (x == a and self._flags > 1)
 
     def __eq__(self, other: 'Itv'):
-        return self.kind == other.kind and self.a == other.a and self.b == other.b
+        if self is other:
+            return True
+        return self._flags == other._flags and self.a == other.a and self.b == other.b
 
     def __hash__(self):
-        return hash((self.a, self.b, self.kind))
+        """
+        第一次调用时计算，之后直接返回缓存的结果
+        """
+        try:
+            return self._hash
+        except AttributeError:
+            h = _hash_itv(self.a, self.b, self._flags)
+            _set_hash(self, h)
+            return h
 
     def __str__(self):
         a, b = self.a, self.b
@@ -235,3 +309,10 @@ class Itv:
         return f'{l}{a}, {b}{r}'
 
     __repr__ = __str__
+
+
+_new_itv = object.__new__
+_set_a = Itv.a.__set__
+_set_b = Itv.b.__set__
+_set_flags = Itv._flags.__set__
+_set_hash = Itv._hash.__set__
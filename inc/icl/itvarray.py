@@ -0,0 +1,230 @@
+"""
+区间序列的列式存储
+端点和边界标志分别存放在连续的numpy数组中，用于批量查询
+"""
+
+from __future__ import annotations
+import struct
+from typing import Iterable
+
+import numpy as np
+
+from . import inf
+from .itv import *
+from .itv import _FLOAT_INF, _INF_TYPE, _create_itv
+
+__all__ = [
+    'ItvArray'
+]
+
+# 文件格式: 头部，端点a的数组，端点b的数组，边界标志数组
+# 头部依次为magic，版本，lo_inf，hi_inf，a和b各自的dtype(如'<i8', '<f8')，区间个数
+# 两列按内存中的dtype原样写入，int64列中的无穷端点为哨兵，由lo_inf和hi_inf标记
+_MAGIC = b'ICLS'
+_VERSION = 2
+_HEADER = struct.Struct('<4sH??8s8sQ')
+# 版本1两列共用一个dtype，无穷端点以float的inf存放
+_HEADER_V1 = struct.Struct('<4sH2x8sQ')
+
+# 两列端点全为int时使用int64，首个下界-inf和最后一个上界inf以最小、最大值为哨兵存放
+# 有限端点与哨兵之间各留一个空位，见_sentinel_key
+_NEG_SENTINEL = -2 ** 63
+_POS_SENTINEL = 2 ** 63 - 1
+_INT_TYPES = (int, np.integer)
+_REAL_TYPES = (int, float, np.integer, np.floating, _INF_TYPE)
+
+
+def _int64_exact(values) -> bool:
+    return all(isinstance(x, _INT_TYPES) and _NEG_SENTINEL + 1 < x < _POS_SENTINEL - 1 for x in values)
+
+
+def _endpoint_array(values: list) -> np.ndarray:
+    """
+    选择能无损存放全部端点的dtype：int64，转换后逐个相等的float64，否则为object数组
+    str等不会被转为numpy的定长字符串
+    """
+    if _int64_exact(values):
+        return np.array(values, dtype=np.int64)
+    if all(isinstance(x, _REAL_TYPES) for x in values):
+        try:
+            arr = np.array([float(x) for x in values], dtype=np.float64)
+        except OverflowError:
+            pass
+        else:
+            if arr.tolist() == values:
+                return arr
+    arr = np.empty(len(values), dtype=object)
+    arr[:] = values
+    return arr
+
+
+def _sentinel_key(x):
+    """
+    把点映射为与含哨兵的int64列比较时大小关系不变的值
+    无穷映射为哨兵，超出有限端点范围的值压到哨兵旁的空位上
+    """
+    if x == _FLOAT_INF:
+        return _POS_SENTINEL
+    if x == -_FLOAT_INF:
+        return _NEG_SENTINEL
+    if x >= _POS_SENTINEL - 1:
+        return _POS_SENTINEL - 1
+    if x <= _NEG_SENTINEL + 1:
+        return _NEG_SENTINEL + 1
+    return x
+
+
+class ItvArray:
+    """
+    按下界有序且互不相交的区间序列
+    a, b为端点数组，flags为与Itv.kind一致的边界标志
+    lo_inf, hi_inf表示a[0]为-inf、b[-1]为inf，此时两列均为int64，对应位置存放哨兵
+    """
+
+    def __init__(self, a: np.ndarray, b: np.ndarray, flags: np.ndarray, lo_inf=False, hi_inf=False):
+        self.a = a
+        self.b = b
+        self.flags = flags
+        self.lo_inf = lo_inf
+        self.hi_inf = hi_inf
+
+    @classmethod
+    def from_itvs(cls, itvs: Iterable[Itv]) -> 'ItvArray':
+        """
+        itvs须按下界有序且互不相交，例如一个ItvSet
+        端点不会被有损地转换，例如int和float混合时超过2**53的int使端点列退化为object数组
+        """
+        itvs = list(itvs)
+        a = [v.a for v in itvs]
+        b = [v.b for v in itvs]
+        lo_inf = bool(itvs) and a[0] == -inf
+        hi_inf = bool(itvs) and b[-1] == inf
+        if _int64_exact(a[lo_inf:]) and _int64_exact(b[:len(b) - hi_inf]):
+            if lo_inf:
+                a[0] = _NEG_SENTINEL
+            if hi_inf:
+                b[-1] = _POS_SENTINEL
+            a, b = np.array(a, dtype=np.int64), np.array(b, dtype=np.int64)
+        else:
+            lo_inf = hi_inf = False
+            a, b = _endpoint_array(a), _endpoint_array(b)
+        flags = np.array([v.kind for v in itvs], dtype=np.uint8)
+        for arr in (a, b, flags):
+            arr.setflags(write=False)
+        return cls(a, b, flags, lo_inf, hi_inf)
+
+    def __len__(self):
+        return len(self.flags)
+
+    def __getitem__(self, i) -> Itv:
+        a, b, flags = self.a.item(i), self.b.item(i), self.flags.item(i)
+        if self.lo_inf and a == _NEG_SENTINEL:
+            a = -_FLOAT_INF
+        if self.hi_inf and b == _POS_SENTINEL:
+            b = _FLOAT_INF
+        return _create_itv(a, b, flags > 1, flags & 1 == 1)
+
+    def __iter__(self):
+        for a, b, flags in zip(*self.columns()):
+            yield _create_itv(a, b, flags > 1, flags & 1 == 1)
+
+    def columns(self):
+        """
+        三列转为list，哨兵还原为float的inf
+        """
+        a, b = self.a.tolist(), self.b.tolist()
+        if self.lo_inf:
+            a[0] = -_FLOAT_INF
+        if self.hi_inf:
+            b[-1] = _FLOAT_INF
+        return a, b, self.flags.tolist()
+
+    def locate(self, points) -> np.ndarray:
+        """
+        返回每个点所在区间的下标，不在任何区间内的点为-1
+        """
+        x = np.asarray(points)
+        if x.dtype.kind == 'f' and x.ndim == 1 and not isinstance(points, np.ndarray):
+            # 列表中int与inf混合时numpy会转为float64，改用与端点相同的无损转换
+            x = _endpoint_array(list(points))
+        if len(self) == 0:
+            return np.full(x.shape, -1, dtype=np.intp)
+
+        # 下界<=x的最后一个区间是唯一可能包含x的区间
+        i = np.searchsorted(self.a, x, side='right') - 1
+        if self.lo_inf:     # 所有点都不小于-inf
+            i = np.maximum(i, 0)
+        j = np.maximum(i, 0)
+        a, b, flags = self.a[j], self.b[j], self.flags[j]
+        left_closed = flags & 2 == 0
+        right_closed = flags & 1 == 0
+        after_a = (a < x) | ((a == x) & left_closed)
+        before_b = (x < b) | ((x == b) & right_closed)
+        # 哨兵位置上按真正的无穷比较
+        if self.lo_inf:
+            after_a = np.where(j == 0, (x != -np.inf) | left_closed, after_a)
+        if self.hi_inf:
+            before_b = np.where(j == len(self) - 1, (x != np.inf) | right_closed, before_b)
+        return np.where((i >= 0) & after_a & before_b, i, -1)
+
+    def contains(self, points) -> np.ndarray:
+        """
+        返回每个点是否落在某个区间内
+        """
+        return self.locate(points) >= 0
+
+    def save(self, path):
+        """
+        以列式二进制格式写入文件，端点须为int或float，两列不做类型转换
+        """
+        for col in (self.a, self.b):
+            if col.dtype.kind not in 'iuf' or col.dtype.itemsize > 8:
+                raise TypeError(f'cannot save endpoints of dtype {col.dtype}')
+        a, b = (col.astype(col.dtype.newbyteorder('<'), copy=False) for col in (self.a, self.b))
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, self.lo_inf, self.hi_inf,
+                                 a.dtype.str.encode(), b.dtype.str.encode(), len(self)))
+            f.write(a.tobytes())
+            f.write(b.tobytes())
+            f.write(self.flags.astype(np.uint8).tobytes())
+
+    @classmethod
+    def load(cls, path, mmap=True) -> 'ItvArray':
+        """
+        读取save写入的文件，兼容版本1
+        mmap为True时数组直接映射文件内容，不复制，且只读
+        """
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+        if len(header) < _HEADER_V1.size or header[:4] != _MAGIC:
+            raise ValueError(f'{path} is not an ItvSet file')
+        version = struct.unpack_from('<H', header, 4)[0]
+        if version == 1:
+            _, _, dtype, n = _HEADER_V1.unpack_from(header)
+            lo_inf = hi_inf = False
+            dtype_a = dtype_b = dtype
+            offset = _HEADER_V1.size
+        elif version == _VERSION:
+            if len(header) < _HEADER.size:
+                raise ValueError(f'{path} is not an ItvSet file')
+            _, _, lo_inf, hi_inf, dtype_a, dtype_b, n = _HEADER.unpack(header)
+            offset = _HEADER.size
+        else:
+            raise ValueError(f'unsupported ItvSet file version {version}')
+        dtype_a, dtype_b = (np.dtype(dt.rstrip(b'\0').decode()) for dt in (dtype_a, dtype_b))
+        if (lo_inf or hi_inf) and not (dtype_a == dtype_b == np.int64):
+            raise ValueError(f'{path} is not an ItvSet file')
+
+        dtypes = [dtype_a, dtype_b, np.dtype(np.uint8)]
+        arrs = []
+        for dt in dtypes:
+            if n == 0:
+                arr = np.empty(0, dt)
+            elif mmap:
+                arr = np.memmap(path, dt, 'r', offset, (n,))
+            else:
+                arr = np.fromfile(path, dt, n, offset=offset)
+            arr.setflags(write=False)
+            arrs.append(arr)
+            offset += n * dt.itemsize
+        return cls(*arrs, lo_inf, hi_inf)
@@ -0,0 +1,260 @@
+"""
+使用treap实现itvmap
+按照boost::icl的splitting规则: 插入时拆分区间，重叠部分的值用aggregate聚合
+值相等且紧挨着的区间会被合并
+"""
+
+from __future__ import annotations
+import operator
+from itertools import zip_longest
+from typing import Any, Callable
+
+from .itv import *
+from .itvset_treap import Node, _abc_order_iter, _build, _columns_itvs, _iter_overlapping, _left_of, _merge, \
+    _Owner, _gc_paused, _pop_max, _pop_min, _size, _split, _tree_columns
+
+__all__ = [
+    'ItvMap'
+]
+
+
+class MapNode(Node):
+    __slots__ = ('value',)
+
+    def __init__(self, itv: Itv, value, owner=None):
+        super().__init__(itv, owner)
+        self.value = value
+
+    def clone(self, owner):
+        n = Node.clone(self, owner)
+        n.value = self.value
+        return n
+
+    def __reduce__(self):
+        return _restore_map_tree, _map_columns(self)
+
+
+def _create_map_node(item, owner):
+    itv, value = item
+    return MapNode(itv, value, owner)
+
+
+def _map_columns(n: MapNode):
+    """
+    按中序展开为(端点a的列表, 端点b的列表, 边界标志, 值的列表)
+    """
+    return _tree_columns(n) + ([m.value for m in _abc_order_iter(n)],)
+
+
+def _restore_map_tree(a, b, flags, values, owner=None):
+    with _gc_paused():
+        return _build(zip(_columns_itvs(a, b, flags), values), owner, _create_map_node)
+
+
+def _restore_itvmap(a, b, flags, values, aggregate):
+    m = ItvMap(aggregate=aggregate)
+    m._root = _restore_map_tree(a, b, flags, values, m._owner)
+    return m
+
+
+def _join(items):
+    """
+    items须按下界有序且互不相交
+    合并值相等且紧挨着的区间
+    """
+    cur = cur_v = None
+    for itv, v in items:
+        if itv.empty():
+            continue
+        if cur is None:
+            cur, cur_v = itv, v
+        elif cur_v == v and cur.intersect_or_near(itv):
+            cur = cur | itv
+        else:
+            yield cur, cur_v
+            cur, cur_v = itv, v
+    if cur is not None:
+        yield cur, cur_v
+
+
+class ItvMap:
+    """
+    interval map
+    区间到值的映射，各个区间互不相交
+    """
+
+    def __init__(self, iterable=None, aggregate: Callable[[Any, Any], Any] = operator.add):
+        """
+        iterable中的元素为(Itv, value)
+        aggregate(old, new)用于计算重叠部分的新值，例如operator.add, operator.or_
+        """
+        self._root: Node = None
+        self._owner = _Owner()  # 只有owner为此对象的节点可以被原地修改
+        self.aggregate = aggregate
+        if iterable is None:
+            return
+        for itv, v in iterable:
+            self.add(itv, v)
+
+    def _cut(self, itv: Itv):
+        """
+        将树分为三部分: 左侧的树，可能受itv影响的节点列表，右侧的树
+        左右两侧紧挨着的节点也被放入列表，以便合并值相等的区间
+        """
+        owner = self._owner
+        t1, t2 = _split(self._root, itv.a, True, owner)
+        t2, t3 = _split(t2, itv.b, True, owner)
+        nodes = list(_abc_order_iter(t2))
+
+        # t1中只有最大的节点可能与itv相交，它被整个覆盖时，次大的节点可能需要合并
+        for _ in range(2):
+            if t1 is None:
+                break
+            t1, n = _pop_max(t1, owner)
+            nodes.insert(0, n)
+        if t3 is not None:
+            t3, n = _pop_min(t3, owner)
+            nodes.append(n)
+        return t1, [(n.itv, n.value) for n in nodes], t3
+
+    def _update(self, itv: Itv, value, aggregate):
+        """
+        aggregate为None时移除itv覆盖的部分
+        O(log n + k)，k为与itv相交的区间数
+        """
+        if itv.empty():
+            return
+
+        t1, items, t3 = self._cut(itv)
+        res = []
+        cur = itv   # itv中尚未被已有区间覆盖的部分
+        for seg, v in items:
+            if not seg.intersect(itv):
+                if not _left_of(seg, itv) and aggregate is not None:
+                    res.append((cur, value))
+                    cur = Itv.empty_set()
+                res.append((seg, v))
+                continue
+
+            v1, v2 = seg - itv
+            g1, cur = cur - seg
+            res.append((v1, v))
+            if aggregate is not None:
+                res.append((g1, value))
+                res.append((seg & itv, aggregate(v, value)))
+            res.append((v2, v))
+        if aggregate is not None:
+            res.append((cur, value))
+
+        owner = self._owner
+        t2 = _build(_join(res), owner, _create_map_node)
+        self._root = _merge(_merge(t1, t2, owner), t3, owner)
+
+    def add(self, itv: Itv, value):
+        """
+        插入区间，与已有区间重叠的部分的值为aggregate(old, value)
+        """
+        self._update(itv, value, self.aggregate)
+
+    def set(self, itv: Itv, value):
+        """
+        插入区间，覆盖已有区间重叠部分的值
+        """
+        self._update(itv, value, _overwrite)
+
+    def remove(self, itv: Itv):
+        """
+        移除itv覆盖的部分
+        """
+        self._update(itv, None, None)
+
+    def empty(self):
+        return self._root is None
+
+    def find(self, x):
+        """
+        返回点x所在的(区间, 值)，不存在时返回None
+        """
+        if self._root is None:
+            return
+        n = self._root.find(x)
+        if n is not None:
+            return n.itv, n.value
+
+    def get(self, x, default=None):
+        """
+        返回点x对应的值
+        """
+        item = self.find(x)
+        return default if item is None else item[1]
+
+    def __getitem__(self, x):
+        item = self.find(x)
+        if item is None:
+            raise KeyError(x)
+        return item[1]
+
+    def __contains__(self, x):
+        """
+        判定一个点是否被某个区间覆盖
+        """
+        return self.find(x) is not None
+
+    def overlapping(self, itv: Itv):
+        """
+        按顺序返回与itv相交的(区间, 值)，O(log n + k)
+        """
+        for n in _iter_overlapping(self._root, itv):
+            yield n.itv, n.value
+
+    def items(self):
+        for n in _abc_order_iter(self._root):
+            yield n.itv, n.value
+
+    def keys(self):
+        for n in _abc_order_iter(self._root):
+            yield n.itv
+
+    def values(self):
+        for n in _abc_order_iter(self._root):
+            yield n.value
+
+    __iter__ = keys
+
+    def __len__(self):
+        return _size(self._root)
+
+    def __eq__(self, other):
+        for a, b in zip_longest(self.items(), other.items()):
+            if a is None or b is None or a[0] != b[0] or a[1] != b[1]:
+                return False
+        return True
+
+    def __str__(self):
+        tmp = ', '.join(f'{itv}: {v!r}' for itv, v in self.items())
+        return 'ItvMap{' + tmp + '}'
+
+    __repr__ = __str__
+
+    def copy(self):
+        """
+        O(1)，两个映射共享所有节点，之后各自修改时按路径复制
+        """
+        self._owner = _Owner()
+        new_ = ItvMap.__new__(ItvMap)
+        new_._root = self._root
+        new_._owner = _Owner()
+        new_.aggregate = self.aggregate
+        return new_
+
+    __copy__ = copy
+
+    def __reduce__(self):
+        """
+        序列化为扁平的列，反序列化时O(n)重建
+        """
+        return _restore_itvmap, _map_columns(self._root) + (self.aggregate,)
+
+
+def _overwrite(old, new):
+    return new
@@ -0,0 +1,275 @@
+"""
+使用treap实现的区间树(interval tree)
+与ItvSet不同，区间不会被合并，相同的区间可以出现多次
+节点额外记录子树中上界最大的区间，用于在查询时剪枝
+"""
+
+from __future__ import annotations
+import random
+from itertools import zip_longest
+from typing import Tuple, Union
+
+from .itv import *
+from .itvseq import left_of
+from .itvset_treap import ItvSet, Node, _abc_order_iter, _build, _columns_itvs, _merge, _Owner, _gc_paused, \
+    _pop_min, _size, _tree_columns
+
+__all__ = [
+    'ItvMultiSet'
+]
+
+
+def _key(itv: Itv):
+    """
+    节点的排序依据：先按下界(同一端点处闭在前)，再按上界(同一端点处开在前)
+    相等的key对应相等的区间
+    """
+    flags = itv._flags
+    return itv.a, flags > 1, itv.b, not flags & 1
+
+
+class MultiNode(Node):
+    __slots__ = ('upper',)
+
+    def __init__(self, itv: Itv, owner=None):
+        super().__init__(itv, owner)
+        self.upper = itv    # 子树中上界最大的区间
+
+    def clone(self, owner):
+        n = Node.clone(self, owner)
+        n.upper = self.upper
+        return n
+
+    def update(self):
+        """
+        在Node.update的基础上重新计算upper
+        """
+        Node.update(self)
+        upper = self.itv
+        for ch in (self.lch, self.rch):
+            if ch is None:
+                continue
+            u = ch.upper
+            if u.b > upper.b or (u.b == upper.b and upper._flags & 1 and not u._flags & 1):
+                upper = u
+        self.upper = upper
+
+    def __reduce__(self):
+        return _restore_multi_tree, _tree_columns(self)
+
+
+def _restore_multi_tree(a, b, flags, owner=None):
+    with _gc_paused():
+        return _build(_columns_itvs(a, b, flags), owner, MultiNode)
+
+
+def _restore_itvmultiset(a, b, flags):
+    s = ItvMultiSet()
+    s._root = _restore_multi_tree(a, b, flags, s._owner)
+    return s
+
+
+def _split_key(n: MultiNode, key, owner=None) -> Union[Tuple[None, None], Tuple[MultiNode, MultiNode]]:
+    """
+    按_key分裂为t1和t2，key小于给定key的节点属于t1
+    与itvset_treap._split相同，自顶向下迭代并按路径复制
+    """
+    t1 = t2 = None
+    l = r = None    # t1的最右节点，t2的最左节点
+    path = []
+    while n is not None:
+        if n.owner is not owner:
+            n = n.clone(owner)
+        path.append(n)
+        if _key(n.itv) < key:
+            if l is None:
+                t1 = n
+            else:
+                l.rch = n
+            l = n
+            n = n.rch
+        else:
+            if r is None:
+                t2 = n
+            else:
+                r.lch = n
+            r = n
+            n = n.lch
+
+    if l is not None:
+        l.rch = None
+    if r is not None:
+        r.lch = None
+    for n in reversed(path):
+        n.update()
+    return t1, t2
+
+
+def _iter_overlapping(n: MultiNode, itv: Itv):
+    """
+    按中序返回与itv相交的节点
+    upper在itv左侧的子树整个跳过，遇到完全位于itv右侧的节点时结束，其后的节点下界都不更小
+    """
+    stack = []
+    while True:
+        while n is not None and not left_of(n.upper, itv):
+            stack.append(n)
+            n = n.lch
+        if not stack:
+            return
+        n = stack.pop()
+        if left_of(itv, n.itv):
+            return
+        if n.itv.intersect(itv):
+            yield n
+        n = n.rch
+
+
+def _rank(n: MultiNode, key, inclusive):
+    """
+    key小于给定key的节点数，inclusive为True时包括等于的
+    """
+    res = 0
+    while n is not None:
+        k = _key(n.itv)
+        if k < key or (inclusive and k == key):
+            res += _size(n.lch) + 1
+            n = n.rch
+        else:
+            n = n.lch
+    return res
+
+
+class ItvMultiSet:
+    """
+    interval multiset
+    保留每个加入的区间，不合并相交的区间，支持查询包含某点或与某区间相交的所有区间
+    """
+
+    def __init__(self, iterable=None, seed=None):
+        """
+        iterable中的元素类型为Itv，空区间被丢弃
+        seed同ItvSet
+        """
+        self._root: MultiNode = None
+        # 只有owner为此对象的节点可以被原地修改
+        self._owner = _Owner() if seed is None else _Owner(random.Random(seed).random)
+        if iterable is None:
+            return
+        itvs = [itv for itv in iterable if not itv.empty()]
+        itvs.sort(key=_key)
+        with _gc_paused():
+            self._root = _build(itvs, self._owner, MultiNode)
+
+    def add(self, itv: Itv):
+        """
+        加入一个区间，已经存在时再加入一份，O(log n)
+        """
+        if itv.empty():
+            return
+        owner = self._owner
+        t1, t2 = _split_key(self._root, _key(itv), owner)
+        self._root = _merge(_merge(t1, MultiNode(itv, owner), owner), t2, owner)
+
+    def discard(self, itv: Itv) -> bool:
+        """
+        移除一份itv，返回是否存在，O(log n)
+        """
+        owner = self._owner
+        key = _key(itv)
+        t1, t2 = _split_key(self._root, key, owner)
+        found = t2 is not None and _key(t2.min().itv) == key
+        if found:
+            t2 = _pop_min(t2, owner)[0]
+        self._root = _merge(t1, t2, owner)
+        return found
+
+    def remove(self, itv: Itv):
+        """
+        同discard，itv不存在时抛出KeyError
+        """
+        if not self.discard(itv):
+            raise KeyError(itv)
+
+    def count(self, itv: Itv) -> int:
+        """
+        itv出现的次数，O(log n)
+        """
+        key = _key(itv)
+        return _rank(self._root, key, True) - _rank(self._root, key, False)
+
+    def empty(self):
+        return self._root is None
+
+    def stab(self, x):
+        """
+        按顺序返回包含点x的区间
+        O(min(n, k log n))，k为结果数，包含x的区间在树中集中时接近O(log n + k)
+        """
+        for n in _iter_overlapping(self._root, Itv(x, x)):
+            yield n.itv
+
+    def overlapping(self, itv: Itv):
+        """
+        按顺序返回与itv相交的区间，复杂度同stab
+        """
+        for n in _iter_overlapping(self._root, itv):
+            yield n.itv
+
+    def __contains__(self, x):
+        """
+        判定一个点是否被某个区间覆盖，找到第一个包含x的区间即返回
+        """
+        for _ in self.stab(x):
+            return True
+        return False
+
+    def max_upper(self):
+        """
+        上界最大的区间，集合为空时返回None，O(1)
+        """
+        return None if self._root is None else self._root.upper
+
+    def coalesce(self) -> ItvSet:
+        """
+        合并相交或紧挨着的区间，返回覆盖范围相同的ItvSet，O(n)
+        """
+        return ItvSet.from_sorted(self)
+
+    def __eq__(self, other):
+        for a, b in zip_longest(self, other):
+            if a is None or b is None or a != b:
+                return False
+        return True
+
+    def __str__(self):
+        tmp = ', '.join(map(str, self))
+        return 'ItvMultiSet{' + tmp + '}'
+
+    __repr__ = __str__
+
+    def __iter__(self):  # 按下界从小到大返回，下界相同时按上界
+        for n in _abc_order_iter(self._root):
+            yield n.itv
+
+    def __len__(self):
+        return _size(self._root)
+
+    def copy(self):
+        """
+        O(1)，两个集合共享所有节点，之后各自修改时按路径复制
+        """
+        owner = self._owner
+        self._owner = _Owner(owner.random)
+        new_ = ItvMultiSet.__new__(ItvMultiSet)
+        new_._root = self._root
+        new_._owner = owner.fork()
+        return new_
+
+    __copy__ = copy
+
+    def __reduce__(self):
+        """
+        序列化为三列扁平数据，反序列化时O(n)重建
+        """
+        return _restore_itvmultiset, _tree_columns(self._root)
@@ -0,0 +1,188 @@
+"""
+有序区间序列上的线性算法
+供各个ItvSet实现批量构建时使用
+"""
+
+from __future__ import annotations
+import heapq
+from itertools import chain
+from typing import Iterable, Iterator
+
+from . import inf
+from .itv import *
+from .itv import _create_itv
+
+__all__ = []
+
+
+def lower_key(itv: Itv):
+    """
+    按下界排序时使用的key，同一端点处闭区间在前
+    """
+    return itv.a, itv._flags > 1
+
+
+def sort_itvs(iterable: Iterable[Itv]) -> list:
+    """
+    按下界排序，丢弃空区间
+    """
+    res = [itv for itv in iterable if not itv.empty()]
+    res.sort(key=lower_key)
+    return res
+
+
+def coalesce(itvs: Iterable[Itv]) -> Iterator[Itv]:
+    """
+    itvs须按下界有序
+    一次扫描合并相交或紧挨着的区间，并丢弃空区间
+    """
+    cur = None
+    for itv in itvs:
+        if itv.empty():
+            continue
+        if cur is None:
+            cur = itv
+        elif cur.intersect_or_near(itv):
+            cur = cur | itv
+        else:
+            yield cur
+            cur = itv
+    if cur is not None:
+        yield cur
+
+
+def merge_sorted(*iterables: Iterable[Itv]) -> Iterator[Itv]:
+    """
+    归并多个按下界有序的区间序列，结果仍按下界有序，但可能相交
+    """
+    return heapq.merge(*iterables, key=lower_key)
+
+
+def left_of(x: Itv, y: Itv):
+    """
+    x完全位于y的左侧
+    """
+    b, a = x.b, y.a
+    return b < a or (b == a and (x._flags & 1 or y._flags & 2) != 0)
+
+
+def gaps(itvs: Iterable[Itv], itv: Itv) -> Iterator[Itv]:
+    """
+    itvs须有序且互不相交，返回它们之间(包括两端到无穷)与itv相交的空隙，不裁剪
+    itvs可以从完全位于itv左侧的最后一个区间开始，更早的区间不影响结果
+    """
+    a, left_open = -inf, False
+    for v in itvs:
+        g = _create_itv(a, v.a, left_open, not v.left_open)
+        if not g.empty() and g.intersect(itv):
+            yield g
+        if left_of(itv, v):
+            return
+        a, left_open = v.b, not v.right_open
+    g = _create_itv(a, inf, left_open, False)
+    if not g.empty() and g.intersect(itv):
+        yield g
+
+
+def upper_key(itv: Itv):
+    """
+    按上界排序时使用的key，同一端点处开区间在前
+    """
+    return itv.b, not itv._flags & 1
+
+
+def union(xs: Iterable[Itv], ys: Iterable[Itv]) -> Iterator[Itv]:
+    """
+    xs和ys须按下界有序，下同
+    """
+    return coalesce(merge_sorted(xs, ys))
+
+
+def union_all(*iterables: Iterable[Itv]) -> Iterator[Itv]:
+    """
+    k路归并后合并，O(N log k)
+    timsort把每个有序序列识别为一个run，归并k个run比heapq.merge逐个比较key快得多
+    """
+    return coalesce(sorted(chain.from_iterable(iterables), key=lower_key))
+
+
+def intersection(xs: Iterable[Itv], ys: Iterable[Itv]) -> Iterator[Itv]:
+    """
+    双指针扫描，每次前进上界较小的一侧
+    """
+    xs, ys = iter(xs), iter(ys)
+    x, y = next(xs, None), next(ys, None)
+    while x is not None and y is not None:
+        if x.intersect(y):
+            yield x & y
+        if upper_key(x) < upper_key(y):
+            x = next(xs, None)
+        else:
+            y = next(ys, None)
+
+
+def intersection_all(*iterables: Iterable[Itv]) -> Iterator[Itv]:
+    """
+    每个序列中的区间须互不相交
+    每个序列各取一个当前区间，按上界放入堆中，它们的交集为[最大的下界, 最小的上界]
+    每次前进上界最小的序列，O(N log k)
+    """
+    its = [iter(x) for x in iterables]
+    heap = []
+    lo = None   # 当前区间中下界最大的
+    for i, it in enumerate(its):
+        v = next(it, None)
+        if v is None:
+            return
+        heap.append((upper_key(v), i, v))
+        if lo is None or lower_key(v) > lower_key(lo):
+            lo = v
+    if not heap:
+        return
+    heapq.heapify(heap)
+
+    while True:
+        _, i, hi = heap[0]
+        v = lo & hi
+        if not v.empty():
+            yield v
+        v = next(its[i], None)
+        if v is None:
+            return
+        # 被替换的区间上界最小，新区间的下界大于它，所以可以直接与lo比较
+        if lower_key(v) > lower_key(lo):
+            lo = v
+        heapq.heapreplace(heap, (upper_key(v), i, v))
+
+
+def difference(xs: Iterable[Itv], ys: Iterable[Itv]) -> Iterator[Itv]:
+    """
+    xs - ys
+    ys中的区间须互不相交
+    """
+    ys = iter(ys)
+    y = next(ys, None)
+    for x in xs:
+        while y is not None:
+            if not x.intersect(y):
+                if lower_key(y) < lower_key(x):  # y在x左边
+                    y = next(ys, None)
+                    continue
+                break  # y在x右边
+            v1, v2 = x - y
+            if not v1.empty():
+                yield v1
+            x = v2
+            if x.empty():  # y覆盖到了x的右端，留给下一个x
+                break
+            y = next(ys, None)
+        if not x.empty():
+            yield x
+
+
+def symmetric_difference(xs: Iterable[Itv], ys: Iterable[Itv]) -> Iterator[Itv]:
+    """
+    (xs - ys) | (ys - xs)
+    xs和ys会被遍历两次
+    """
+    return union(difference(xs, ys), difference(ys, xs))
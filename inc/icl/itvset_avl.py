@@ -0,0 +1,254 @@
+"""
+使用avl树实现itvset
+不需要随机优先级，最坏情况下树高也不超过1.44*log2(n)
+分裂与合并都基于join，递归深度不超过树高
+"""
+
+from __future__ import annotations
+from typing import Tuple, Union
+
+from .itv import *
+from .itvset_treap import ItvSet, Node, _backends
+
+__all__ = [
+    'AvlItvSet'
+]
+
+
+class AvlNode(Node):
+    """
+    tree_height为子树高度，叶节点为1
+    不使用priority
+    """
+
+    __slots__ = ('tree_height',)
+
+    def __init__(self, itv: Itv, owner=None):
+        self.itv = itv
+        self.lch: 'AvlNode' = None
+        self.rch: 'AvlNode' = None
+        self.size = 1
+        self.measure = None
+        self.fingerprint = None
+        self.tree_height = 1
+        self.owner = owner
+
+    def clone(self, owner):
+        n = object.__new__(self.__class__)
+        n.itv = self.itv
+        n.lch = self.lch
+        n.rch = self.rch
+        n.size = self.size
+        n.measure = self.measure
+        n.fingerprint = self.fingerprint
+        n.tree_height = self.tree_height
+        n.owner = owner
+        return n
+
+    def update(self):
+        """
+        根据子节点重新计算size和高度，measure和fingerprint在需要时再计算
+        """
+        size, height = 1, 0
+        lch, rch = self.lch, self.rch
+        if lch is not None:
+            size += lch.size
+            height = lch.tree_height
+        if rch is not None:
+            size += rch.size
+            if rch.tree_height > height:
+                height = rch.tree_height
+        self.size = size
+        self.measure = None
+        self.fingerprint = None
+        self.tree_height = height + 1
+
+    def height(self):
+        return self.tree_height
+
+
+def _height(n: AvlNode):
+    return 0 if n is None else n.tree_height
+
+
+def _own(n: AvlNode, owner):
+    """
+    不属于owner的节点先复制再修改
+    """
+    return n if n.owner is owner else n.clone(owner)
+
+
+def _rotate_left(n: AvlNode, owner) -> AvlNode:
+    """
+    n须属于owner
+    """
+    r = _own(n.rch, owner)
+    n.rch = r.lch
+    n.update()
+    r.lch = n
+    r.update()
+    return r
+
+
+def _rotate_right(n: AvlNode, owner) -> AvlNode:
+    l = _own(n.lch, owner)
+    n.lch = l.rch
+    n.update()
+    l.rch = n
+    l.update()
+    return l
+
+
+def _join_right(l: AvlNode, m: AvlNode, r: AvlNode, owner) -> AvlNode:
+    """
+    l比r高2层以上，沿l的右侧路径下降到与r高度相近处挂上m
+    """
+    l = _own(l, owner)
+    c = l.rch
+    if _height(c) <= _height(r) + 1:
+        m.lch, m.rch = c, r
+        m.update()
+        l.rch = m
+        if m.tree_height > _height(l.lch) + 1:
+            l.rch = _rotate_right(m, owner)
+            l.update()
+            return _rotate_left(l, owner)
+        l.update()
+        return l
+
+    t = _join_right(c, m, r, owner)
+    l.rch = t
+    l.update()
+    if t.tree_height > _height(l.lch) + 1:
+        return _rotate_left(l, owner)
+    return l
+
+
+def _join_left(l: AvlNode, m: AvlNode, r: AvlNode, owner) -> AvlNode:
+    r = _own(r, owner)
+    c = r.lch
+    if _height(c) <= _height(l) + 1:
+        m.lch, m.rch = l, c
+        m.update()
+        r.lch = m
+        if m.tree_height > _height(r.rch) + 1:
+            r.lch = _rotate_left(m, owner)
+            r.update()
+            return _rotate_right(r, owner)
+        r.update()
+        return r
+
+    t = _join_left(l, m, c, owner)
+    r.lch = t
+    r.update()
+    if t.tree_height > _height(r.rch) + 1:
+        return _rotate_right(r, owner)
+    return r
+
+
+def _join(l: AvlNode, m: AvlNode, r: AvlNode, owner=None) -> AvlNode:
+    """
+    l中的区间全部在m左边，r中的区间全部在m右边，m须属于owner
+    O(|h(l) - h(r)| + 1)
+    """
+    hl, hr = _height(l), _height(r)
+    if hl > hr + 1:
+        return _join_right(l, m, r, owner)
+    if hr > hl + 1:
+        return _join_left(l, m, r, owner)
+    m.lch, m.rch = l, r
+    m.update()
+    return m
+
+
+def _split(n: AvlNode, x, is_open=False, owner=None) -> Union[Tuple[None, None], Tuple[AvlNode, AvlNode]]:
+    """
+    与treap的_split规则相同：下界<=x的节点属于t1
+    is_open为True时，下界为开且等于x的节点属于t2
+    """
+    if n is None:
+        return None, None
+
+    itv = n.itv
+    m = _own(n, owner)
+    a = itv.a
+    if a < x or (a == x and not (is_open and itv._flags > 1)):
+        t1, t2 = _split(n.rch, x, is_open, owner)
+        return _join(n.lch, m, t1, owner), t2
+    t1, t2 = _split(n.lch, x, is_open, owner)
+    return t1, _join(t2, m, n.rch, owner)
+
+
+def _pop_max(n: AvlNode, owner=None):
+    """
+    移除最大的节点，返回(新的树, 被移除的节点)
+    """
+    if n.rch is None:
+        return n.lch, n
+    t, res = _pop_max(n.rch, owner)
+    return _join(n.lch, _own(n, owner), t, owner), res
+
+
+def _pop_min(n: AvlNode, owner=None):
+    """
+    移除最小的节点，返回(新的树, 被移除的节点)
+    """
+    if n.lch is None:
+        return n.rch, n
+    t, res = _pop_min(n.lch, owner)
+    return _join(t, _own(n, owner), n.rch, owner), res
+
+
+def _merge(t1: AvlNode, t2: AvlNode, owner=None) -> AvlNode:
+    """
+    t1中的区间全部在t2左边
+    """
+    if t1 is None:
+        return t2
+    if t2 is None:
+        return t1
+    t2, m = _pop_min(t2, owner)
+    return _join(t1, _own(m, owner), t2, owner)
+
+
+def _link(nodes, lo, hi) -> AvlNode:
+    """
+    以nodes[lo:hi]的中点为根递归构建，左右子树高度差不超过1
+    """
+    if lo >= hi:
+        return None
+    mid = (lo + hi) // 2
+    n = nodes[mid]
+    n.lch = _link(nodes, lo, mid)
+    n.rch = _link(nodes, mid + 1, hi)
+    n.update()
+    return n
+
+
+def _build(itvs, owner=None, create=AvlNode) -> AvlNode:
+    """
+    itvs须按下界有序且互不相交，O(n)
+    """
+    nodes = [create(itv, owner) for itv in itvs]
+    return _link(nodes, 0, len(nodes))
+
+
+AvlNode._tree_build = staticmethod(_build)
+
+
+class AvlItvSet(ItvSet):
+    """
+    使用avl树的interval set
+    也可以通过ItvSet(..., backend='avl')或set_default_backend('avl')创建
+    """
+
+    _node = AvlNode
+    _split = staticmethod(_split)
+    _merge = staticmethod(_merge)
+    _build = staticmethod(_build)
+    _join = staticmethod(_join)
+    _pop_max = staticmethod(_pop_max)
+    _pop_min = staticmethod(_pop_min)
+
+
+_backends['avl'] = AvlItvSet
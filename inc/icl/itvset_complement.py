@@ -0,0 +1,130 @@
+"""
+区间集合的补集视图
+不复制原集合，所有查询都在原集合上按需计算，原集合修改后视图随之变化
+"""
+
+from __future__ import annotations
+from itertools import zip_longest
+
+from . import inf
+from .itv import *
+from . import itvset_treap
+from .itvset_treap import ItvSet
+
+__all__ = [
+    'ItvSetComplement'
+]
+
+
+class ItvSetComplement:
+    """
+    -s返回的补集视图，全集为[-inf, inf]
+    其中的区间即s的空隙
+    """
+
+    def __init__(self, s):
+        """
+        s为ItvSet或FrozenItvSet
+        """
+        self._s = s
+
+    def _coerce(self, other):
+        """
+        参与运算的其他对象转为与原集合同类的集合
+        """
+        if isinstance(other, ItvSet) or isinstance(other, itvset_treap._sorted_set_types):
+            return other
+        return type(self._s)(other)
+
+    def materialize(self):
+        """
+        构建内容相同的集合，O(n)
+        """
+        return type(self._s).from_sorted(self)
+
+    def empty(self):
+        s = self._s
+        return len(s) == 1 and s.kth(0) == Itv(-inf, inf)
+
+    def __contains__(self, x):
+        return x not in self._s
+
+    def overlapping(self, itv: Itv):
+        """
+        按顺序返回与itv相交的区间，O(log n + k)
+        """
+        return self._s._gaps_overlapping(itv)
+
+    def clip(self, itv: Itv):
+        """
+        按顺序返回被itv裁剪后的区间
+        """
+        return self._s.iter_gaps(itv)
+
+    def iter_gaps(self, window: Itv = None):
+        """
+        补集的空隙即原集合中的区间
+        """
+        if window is None:
+            return iter(self._s)
+        return self._s.clip(window)
+
+    def __neg__(self):
+        return self._s.copy()
+
+    def __and__(self, other):
+        if isinstance(other, ItvSetComplement):
+            return ItvSetComplement(self._s | other._s)
+        return self._coerce(other) - self._s
+
+    def __or__(self, other):
+        if isinstance(other, ItvSetComplement):
+            return ItvSetComplement(self._s & other._s)
+        return ItvSetComplement(self._s - self._coerce(other))
+
+    def __sub__(self, other):
+        if isinstance(other, ItvSetComplement):
+            return other._s - self._s
+        return ItvSetComplement(self._s | self._coerce(other))
+
+    def __xor__(self, other):
+        if isinstance(other, ItvSetComplement):
+            return self._s ^ other._s
+        return ItvSetComplement(self._s ^ self._coerce(other))
+
+    # 集合运算中补集在右侧时，ItvSet的运算符返回NotImplemented，由下面的反射方法改写为原集合上的运算
+    __rand__ = __and__
+    __ror__ = __or__
+    __rxor__ = __xor__
+
+    def __rsub__(self, other):
+        return self._coerce(other) & self._s
+
+    def __eq__(self, other):
+        for a, b in zip_longest(self, other):
+            if a is None or b is None or a != b:
+                return False
+        return True
+
+    def __str__(self):
+        tmp = ', '.join(map(str, self))
+        return 'ItvSetComplement{' + tmp + '}'
+
+    __repr__ = __str__
+
+    def __iter__(self):  # 从小到大返回
+        return self._s.iter_gaps()
+
+    def __len__(self):
+        """
+        O(log n)
+        """
+        s = self._s
+        n = len(s)
+        if n == 0:
+            return 1
+        first, last = s.kth(0), s.kth(-1)
+        return n + 1 - (first.a == -inf and not first.left_open) - (last.b == inf and not last.right_open)
+
+
+itvset_treap._complement_types += (ItvSetComplement,)
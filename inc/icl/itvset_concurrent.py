@@ -0,0 +1,146 @@
+"""
+多线程共享的itvset
+写操作在已发布集合的副本上进行，完成后一次性替换引用，读操作不加锁
+"""
+
+from __future__ import annotations
+import threading
+from contextlib import contextmanager
+
+from . import itvset_treap
+from .itv import *
+from .itvset_treap import ItvSet
+
+__all__ = [
+    'ConcurrentItvSet'
+]
+
+# 直接转发给当前快照的只读方法
+_READ_METHODS = frozenset([
+    'empty', 'contains_many', 'locate_many', 'freeze', 'save', 'kth', 'rank', 'measure',
+    'overlapping', 'irange', 'clip', 'iter_gaps', 'floor', 'ceil', 'nearest', 'distance',
+    'successor', 'predecessor', 'fingerprint',
+])
+
+
+class ConcurrentItvSet:
+    """
+    一个写线程(或多个写线程，彼此之间加锁)与任意多个读线程共享的interval set
+    已发布的ItvSet从不被原地修改：写操作先O(1)复制，修改时只按路径复制经过的节点，
+    最后替换self._set，读线程看到的总是某一次写完成后的完整状态
+    """
+
+    def __init__(self, iterable=None, backend=None, seed=None):
+        """
+        参数同ItvSet
+        """
+        self._set = ItvSet(iterable, backend, seed)
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> ItvSet:
+        """
+        当前状态的副本，O(1)，之后的写操作不影响它
+        需要在同一个状态上做多次查询时使用
+        """
+        return self._set.copy()
+
+    @contextmanager
+    def writing(self):
+        """
+        在with块中修改yield出的集合，正常退出时整体发布，发生异常时丢弃所有修改
+        同一时刻只有一个写操作
+        """
+        with self._lock:
+            s = self._set.copy()
+            yield s
+            self._set = s
+
+    def add(self, itv: Itv):
+        with self.writing() as s:
+            s.add(itv)
+
+    def remove(self, itv: Itv):
+        with self.writing() as s:
+            s.remove(itv)
+
+    def add_many(self, iterable):
+        with self.writing() as s:
+            s.add_many(iterable)
+
+    def remove_many(self, iterable):
+        with self.writing() as s:
+            s.remove_many(iterable)
+
+    def __iand__(self, other):
+        with self.writing() as s:
+            s &= other
+        return self
+
+    def __ior__(self, other):
+        with self.writing() as s:
+            s |= other
+        return self
+
+    def __isub__(self, other):
+        with self.writing() as s:
+            s -= other
+        return self
+
+    def __ixor__(self, other):
+        with self.writing() as s:
+            s ^= other
+        return self
+
+    def __getattr__(self, name):
+        if name in _READ_METHODS:
+            return getattr(self._set, name)
+        raise AttributeError(f'{type(self).__name__!r} object has no attribute {name!r}')
+
+    def __contains__(self, x):
+        return x in self._set
+
+    def __and__(self, other):
+        return self._set & other
+
+    def __or__(self, other):
+        return self._set | other
+
+    def __sub__(self, other):
+        return self._set - other
+
+    def __xor__(self, other):
+        return self._set ^ other
+
+    def __neg__(self):
+        return -self.snapshot()
+
+    def __eq__(self, other):
+        return self._set == other
+
+    def __str__(self):
+        tmp = ', '.join(map(str, self))
+        return 'ConcurrentItvSet{' + tmp + '}'
+
+    __repr__ = __str__
+
+    def __iter__(self):  # 从小到大返回，遍历开始时的快照
+        return iter(self._set)
+
+    def __len__(self):
+        return len(self._set)
+
+    def __getitem__(self, i):
+        return self._set[i]
+
+    def __reduce__(self):
+        return _restore_concurrent, (self._set,)
+
+
+def _restore_concurrent(s: ItvSet):
+    new_ = ConcurrentItvSet.__new__(ConcurrentItvSet)
+    new_._set = s
+    new_._lock = threading.Lock()
+    return new_
+
+
+itvset_treap._sorted_set_types += (ConcurrentItvSet,)
@@ -0,0 +1,381 @@
+"""
+使用有序数组实现的只读itvset
+适合构建一次后大量查询的场景
+"""
+
+from __future__ import annotations
+from bisect import bisect_left, bisect_right
+from itertools import zip_longest
+
+import numpy as np
+
+from . import inf
+from . import itvset_treap
+from . import itvseq
+from .itv import *
+from .itv import _hash_itv
+from .itvarray import ItvArray, _sentinel_key
+from .itvseq import sort_itvs, coalesce
+from .itvset_treap import ItvSet, _MASK64, _as_sorted, _distance, _range_itv
+
+__all__ = [
+    'FrozenItvSet'
+]
+
+
+def _bisect_view(arr: np.ndarray):
+    """
+    bisect逐个访问元素，数值数组通过memoryview访问以得到python数值
+    """
+    if arr.dtype == object:
+        return arr.tolist()
+    return memoryview(np.ascontiguousarray(arr))
+
+
+class FrozenItvSet:
+    """
+    frozen interval set
+    端点和边界标志存放在连续的数组中，创建后不可修改
+    """
+
+    def __init__(self, iterable=None):
+        """
+        iterable中的元素类型为Itv
+        """
+        itvs = () if iterable is None else coalesce(sort_itvs(iterable))
+        self._init(ItvArray.from_itvs(itvs))
+
+    def _init(self, arr: ItvArray):
+        self._arr = arr
+        self._fingerprint = None    # 第一次使用时计算
+        self._a = _bisect_view(arr.a)
+        self._b = _bisect_view(arr.b)
+        self._flags = memoryview(np.ascontiguousarray(arr.flags))
+        # 列中有哨兵时，与列比较的点先经_sentinel_key映射
+        self._sentinel = arr.lo_inf or arr.hi_inf
+
+    @classmethod
+    def _create(cls, arr: ItvArray):
+        """
+        拒绝端点不能被逐个精确比较的数组，例如numpy的定长字符串，或不在int64列上的哨兵
+        """
+        for col in (arr.a, arr.b):
+            if col.dtype.kind not in 'iufO':
+                raise TypeError(f'unsupported endpoint dtype {col.dtype}')
+        if (arr.lo_inf or arr.hi_inf) and not (arr.a.dtype == arr.b.dtype == np.int64):
+            raise ValueError('infinite endpoint sentinels require int64 columns')
+        new_ = cls.__new__(cls)
+        new_._init(arr)
+        return new_
+
+    @classmethod
+    def from_sorted(cls, itvs):
+        """
+        itvs须按下界有序，相交或紧挨着的区间会被合并
+        O(n)
+        """
+        return cls._create(ItvArray.from_itvs(coalesce(itvs)))
+
+    @classmethod
+    def from_iterable(cls, iterable, presorted=False):
+        """
+        presorted为True时跳过排序
+        """
+        if presorted:
+            return cls.from_sorted(iterable)
+        return cls.from_sorted(sort_itvs(iterable))
+
+    def save(self, path):
+        """
+        写入二进制文件，见ItvArray.save
+        """
+        self._arr.save(path)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        mmap为True时直接映射文件，不复制数据，O(1)
+        """
+        return cls._create(ItvArray.load(path, mmap))
+
+    def thaw(self) -> ItvSet:
+        """
+        返回内容相同的可修改ItvSet，O(n)
+        """
+        return ItvSet.from_sorted(self)
+
+    def freeze(self):
+        return self
+
+    def copy(self):
+        return self
+
+    def empty(self):
+        return len(self._flags) == 0
+
+    def _array(self):
+        return self._arr
+
+    def contains_many(self, points):
+        """
+        批量判定点是否在集合内，返回bool数组
+        """
+        return self._arr.contains(points)
+
+    def locate_many(self, points):
+        """
+        批量查找点所在区间的下标(与kth一致)，不在集合内的点为-1
+        """
+        return self._arr.locate(points)
+
+    def __contains__(self, x):
+        """
+        判定一个点是否在集合内，O(log n)
+        """
+        if self._sentinel:
+            x = _sentinel_key(x)
+        i = bisect_right(self._a, x) - 1
+        if i < 0:
+            return False
+        a, b, flags = self._a[i], self._b[i], self._flags[i]
+        return (a < x or (a == x and not flags & 2)) \
+            and (x < b or (x == b and not flags & 1))
+
+    def _first_not_left_of(self, itv: Itv):
+        """
+        第一个不完全位于itv左侧的区间的下标
+        """
+        x = _sentinel_key(itv.a) if self._sentinel else itv.a
+        i = bisect_left(self._b, x)
+        if i < len(self) and self._b[i] == x and (self._flags[i] & 1 or itv._flags & 2):
+            i += 1
+        return i
+
+    def overlapping(self, itv: Itv):
+        """
+        按顺序返回与itv相交的区间，O(log n + k)
+        """
+        arr = self._arr
+        for i in range(self._first_not_left_of(itv), len(self)):
+            v = arr[i]
+            if not v.intersect(itv):
+                return
+            yield v
+
+    def irange(self, lo=None, hi=None, inclusive=(True, True)):
+        """
+        按顺序返回与[lo, hi]相交的区间，None表示无界
+        inclusive表示lo和hi是否包含在范围内
+        """
+        return self.overlapping(_range_itv(lo, hi, inclusive))
+
+    def clip(self, itv: Itv):
+        """
+        按顺序返回与itv的交集，即被itv裁剪后的区间
+        """
+        for v in self.overlapping(itv):
+            yield v & itv
+
+    def _gaps_overlapping(self, itv: Itv):
+        """
+        按顺序返回与itv相交的空隙，不裁剪，O(log n + k)
+        """
+        arr = self._arr
+        it = (arr[i] for i in range(max(self._first_not_left_of(itv) - 1, 0), len(self)))
+        return itvseq.gaps(it, itv)
+
+    def iter_gaps(self, window: Itv = None):
+        """
+        按顺序返回window内不被集合覆盖的部分，None表示整个数轴
+        """
+        if window is None:
+            window = Itv(-inf, inf)
+        for g in self._gaps_overlapping(window):
+            yield g & window
+
+    def __neg__(self):
+        """
+        返回补集的视图，不复制
+        """
+        from .itvset_complement import ItvSetComplement
+
+        return ItvSetComplement(self)
+
+    def __and__(self, other):
+        if isinstance(other, itvset_treap._complement_types):
+            return NotImplemented
+        return self.from_sorted(itvseq.intersection(self, _as_sorted(other)))
+
+    def __or__(self, other):
+        if isinstance(other, itvset_treap._complement_types):
+            return NotImplemented
+        return self.from_sorted(itvseq.union(self, _as_sorted(other)))
+
+    def __sub__(self, other):
+        if isinstance(other, itvset_treap._complement_types):
+            return NotImplemented
+        return self.from_sorted(itvseq.difference(self, _as_sorted(other)))
+
+    def __xor__(self, other):
+        if isinstance(other, itvset_treap._complement_types):
+            return NotImplemented
+        return self.from_sorted(itvseq.symmetric_difference(self, _as_sorted(other)))
+
+    def fingerprint(self) -> int:
+        """
+        同ItvSet.fingerprint，第一次调用时O(n)，之后O(1)
+        由ItvSet.freeze创建时直接继承
+        """
+        fp = self._fingerprint
+        if fp is None:
+            columns = self._arr.columns() if self._sentinel else (self._a, self._b, self._flags)
+            fp = self._fingerprint = sum(map(_hash_itv, *columns)) & _MASK64
+        return fp
+
+    def __hash__(self):
+        """
+        不可修改，可以作为dict的键或放入set
+        """
+        return hash((len(self), self.fingerprint()))
+
+    def __eq__(self, other):
+        """
+        对方也是有序的区间集合时，先比较大小和指纹
+        """
+        if isinstance(other, ItvSet) or isinstance(other, itvset_treap._sorted_set_types):
+            if len(self) != len(other) or self.fingerprint() != other.fingerprint():
+                return False
+        for a, b in zip_longest(self, other):
+            if a is None or b is None or a != b:
+                return False
+        return True
+
+    def __str__(self):
+        tmp = ', '.join(map(str, self))
+        return 'FrozenItvSet{' + tmp + '}'
+
+    __repr__ = __str__
+
+    def __iter__(self):  # 从小到大返回
+        return iter(self._arr)
+
+    def __len__(self):
+        return len(self._flags)
+
+    def __reduce__(self):
+        """
+        序列化ItvArray的三列，不能直接序列化memoryview
+        """
+        arr = self._arr
+        return _restore_frozen, (np.asarray(arr.a), np.asarray(arr.b), np.asarray(arr.flags), arr.lo_inf, arr.hi_inf)
+
+    def __getitem__(self, i):
+        """
+        i为整数时返回第i个区间
+        i为切片时返回对应区间组成的FrozenItvSet，不复制数组
+        """
+        if isinstance(i, slice):
+            idx = range(len(self))[i]
+            if not idx:
+                i = slice(0, 0)
+            else:
+                if idx.step < 0:    # 保持有序
+                    idx = idx[::-1]
+                i = slice(idx.start, idx.stop, idx.step)
+            arr = self._arr
+            lo_inf = arr.lo_inf and bool(idx) and idx[0] == 0
+            hi_inf = arr.hi_inf and bool(idx) and idx[-1] == len(self) - 1
+            return self._create(ItvArray(arr.a[i], arr.b[i], arr.flags[i], lo_inf, hi_inf))
+        return self.kth(i)
+
+    def kth(self, i) -> Itv:
+        """
+        返回第i个区间（从0开始，支持负数），O(1)
+        """
+        size = len(self)
+        if i < 0:
+            i += size
+        if not 0 <= i < size:
+            raise IndexError('FrozenItvSet index out of range')
+        return self._arr[i]
+
+    def rank(self, x) -> int:
+        """
+        完全位于点x左侧的区间个数，O(log n)
+        若x落在集合内，则x所在的区间为self.kth(self.rank(x))
+        """
+        if self._sentinel:
+            x = _sentinel_key(x)
+        i = bisect_left(self._b, x)
+        if i < len(self) and self._b[i] == x and self._flags[i] & 1:
+            i += 1
+        return i
+
+    def _floor_ceil(self, x):
+        """
+        见itvset_treap._floor_ceil，返回两个区间
+        """
+        i = self.rank(x)
+        n = len(self)
+        hi = self._arr[i] if i < n else None
+        if hi is not None and x in hi:
+            return hi, hi
+        return (self._arr[i - 1] if i > 0 else None), hi
+
+    def floor(self, x):
+        """
+        x所在的区间，x不在集合内时返回x左侧最近的区间，没有则返回None，O(log n)
+        """
+        return self._floor_ceil(x)[0]
+
+    def ceil(self, x):
+        """
+        x所在的区间，x不在集合内时返回x右侧最近的区间，没有则返回None，O(log n)
+        """
+        return self._floor_ceil(x)[1]
+
+    def nearest(self, x):
+        """
+        距离点x最近的区间，距离相同时返回左边的，集合为空时返回None，O(log n)
+        """
+        lo, hi = self._floor_ceil(x)
+        if lo is None or hi is None or lo is hi:
+            return hi if lo is None else lo
+        return hi if _distance(hi, x) < _distance(lo, x) else lo
+
+    def distance(self, x):
+        """
+        点x到集合的距离，x在集合内时为0，集合为空时为inf，O(log n)
+        """
+        v = self.nearest(x)
+        return inf if v is None else _distance(v, x)
+
+    def successor(self, itv: Itv):
+        """
+        完全位于itv右侧的第一个区间，itv为空集或没有这样的区间时返回None，O(log n)
+        """
+        if itv.empty():
+            return None
+        x = _sentinel_key(itv.b) if self._sentinel else itv.b
+        i = bisect_right(self._a, x)
+        if i > 0 and self._a[i - 1] == x and (self._flags[i - 1] & 2 or itv._flags & 1):
+            i -= 1
+        return self._arr[i] if i < len(self) else None
+
+    def predecessor(self, itv: Itv):
+        """
+        完全位于itv左侧的最后一个区间，itv为空集或没有这样的区间时返回None，O(log n)
+        """
+        if itv.empty():
+            return None
+        i = self._first_not_left_of(itv)
+        return self._arr[i - 1] if i > 0 else None
+
+
+def _restore_frozen(a, b, flags, lo_inf=False, hi_inf=False):
+    for x in (a, b, flags):
+        x.setflags(write=False)
+    return FrozenItvSet._create(ItvArray(a, b, flags, lo_inf, hi_inf))
+
+
+itvset_treap._sorted_set_types += (FrozenItvSet,)
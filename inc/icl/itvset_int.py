@@ -0,0 +1,290 @@
+"""
+整数区间集合
+所有区间统一为左闭右开的[a, b)，端点为int64，存放在两个有序的array中
+[1, 3]和[4, 6]表示[1, 4)和[4, 7)，紧挨着，会被合并
+"""
+
+from __future__ import annotations
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import zip_longest
+
+from . import inf
+from .itv import *
+
+__all__ = [
+    'IntItvSet'
+]
+
+# 分别表示-inf和inf，超出范围的端点被截断到这两个值，即视为无穷
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+
+
+def _clamp(x: int) -> int:
+    return _INT64_MIN if x < _INT64_MIN else _INT64_MAX if x > _INT64_MAX else x
+
+
+def _lower(itv: Itv) -> int:
+    """
+    区间内最小的整数
+    """
+    a = itv.a
+    if a == -inf:
+        return _INT64_MIN
+    if a == inf:    # 区间内没有整数，与_upper的结果构成空区间
+        return _INT64_MAX
+    return _clamp(math.floor(a) + 1 if itv.left_open else math.ceil(a))
+
+
+def _upper(itv: Itv) -> int:
+    """
+    区间内最大的整数加1
+    """
+    b = itv.b
+    if b == inf:
+        return _INT64_MAX
+    if b == -inf:
+        return _INT64_MIN
+    return _clamp(math.ceil(b) if itv.right_open else math.floor(b) + 1)
+
+
+def _to_itv(lo: int, hi: int) -> Itv:
+    if lo == _INT64_MIN:
+        return Itv(-inf, inf if hi == _INT64_MAX else hi, '()')
+    if hi == _INT64_MAX:
+        return Itv(lo, inf, '[)')
+    return Itv(lo, hi, '[)')
+
+
+def _normalize(iterable):
+    """
+    转为按下界有序、互不相交且不紧挨着的(a, b)列表
+    """
+    ranges = []
+    for itv in iterable:
+        if itv.empty():
+            continue
+        lo, hi = _lower(itv), _upper(itv)
+        if lo < hi:
+            ranges.append((lo, hi))
+    ranges.sort()
+
+    res = []
+    for lo, hi in ranges:
+        if res and lo <= res[-1][1]:
+            if hi > res[-1][1]:
+                res[-1] = (res[-1][0], hi)
+        else:
+            res.append((lo, hi))
+    return res
+
+
+def _boundaries(a: array, b: array) -> array:
+    """
+    交错排列为a0, b0, a1, b1, ...，严格递增
+    """
+    p = array('q', bytes(16 * len(a)))
+    p[0::2] = a
+    p[1::2] = b
+    return p
+
+
+def _sweep(p1: array, p2: array, pred):
+    """
+    依次经过两个集合的所有端点，维护点是否在各个集合内
+    输出pred(in1, in2)为真的部分，结果自然有序且合并
+    """
+    a, b = array('q'), array('q')
+    n1, n2 = len(p1), len(p2)
+    end = _INT64_MAX + 1
+    i = j = 0
+    in1 = in2 = inside = False
+    while i < n1 or j < n2:
+        x = min(p1[i] if i < n1 else end, p2[j] if j < n2 else end)
+        if i < n1 and p1[i] == x:
+            in1 = not in1
+            i += 1
+        if j < n2 and p2[j] == x:
+            in2 = not in2
+            j += 1
+        now = pred(in1, in2)
+        if now != inside:
+            (a if now else b).append(x)
+            inside = now
+    return a, b
+
+
+class IntItvSet:
+    """
+    integer interval set
+    只关心区间内的整数，例如[1, 3]和(0, 3.5)相同
+    """
+
+    def __init__(self, iterable=None):
+        """
+        iterable中的元素类型为Itv，-inf和inf分别对应int64的最小值和最大值
+        超出int64范围的端点视为无穷
+        """
+        ranges = [] if iterable is None else _normalize(iterable)
+        self._a = array('q', [lo for lo, _ in ranges])
+        self._b = array('q', [hi for _, hi in ranges])
+
+    @classmethod
+    def _create(cls, a: array, b: array):
+        new_ = cls.__new__(cls)
+        new_._a = a
+        new_._b = b
+        return new_
+
+    def add(self, itv: Itv):
+        """
+        插入区间，合并相交或紧挨着的区间，O(log n + 移动的元素数)
+        """
+        if itv.empty():
+            return
+        lo, hi = _lower(itv), _upper(itv)
+        if lo >= hi:
+            return
+        a, b = self._a, self._b
+        i = bisect_left(b, lo)     # 第一个右端点>=lo的区间，与新区间相交或紧挨着
+        j = bisect_right(a, hi)    # 左端点<=hi的区间个数
+        if i < j:
+            lo = min(lo, a[i])
+            hi = max(hi, b[j - 1])
+        a[i:j] = array('q', [lo])
+        b[i:j] = array('q', [hi])
+
+    def remove(self, itv: Itv):
+        """
+        移除区间
+        """
+        if itv.empty():
+            return
+        lo, hi = _lower(itv), _upper(itv)
+        if lo >= hi:
+            return
+        a, b = self._a, self._b
+        i = bisect_right(b, lo)    # 第一个右端点>lo的区间
+        j = bisect_left(a, hi)     # 左端点<hi的区间个数
+        if i >= j:
+            return
+        new_a, new_b = array('q'), array('q')
+        if a[i] < lo:
+            new_a.append(a[i])
+            new_b.append(lo)
+        if b[j - 1] > hi:
+            new_a.append(hi)
+            new_b.append(b[j - 1])
+        a[i:j] = new_a
+        b[i:j] = new_b
+
+    def add_many(self, iterable):
+        self |= IntItvSet(iterable)
+
+    def remove_many(self, iterable):
+        self -= IntItvSet(iterable)
+
+    def empty(self):
+        return len(self._a) == 0
+
+    def __contains__(self, x):
+        """
+        x须为整数，O(log n)
+        """
+        i = bisect_right(self._a, x) - 1
+        return i >= 0 and x < self._b[i]
+
+    def contains_many(self, points):
+        """
+        批量判定整数点是否在集合内，返回bool数组，需要numpy
+        端点数组不复制，直接按int64解释
+        """
+        import numpy as np
+
+        x = np.asarray(points)
+        a = np.frombuffer(self._a, dtype=np.int64)
+        b = np.frombuffer(self._b, dtype=np.int64)
+        if len(a) == 0:
+            return np.zeros(x.shape, dtype=bool)
+        i = np.searchsorted(a, x, side='right') - 1
+        return (i >= 0) & (x < b[np.maximum(i, 0)])
+
+    def measure(self):
+        """
+        集合中整数的个数，包含无穷端点时为inf
+        """
+        a, b = self._a, self._b
+        if a and (a[0] == _INT64_MIN or b[-1] == _INT64_MAX):
+            return inf
+        return sum(b) - sum(a)
+
+    def _binary_op(self, other, pred):
+        if not isinstance(other, IntItvSet):
+            other = IntItvSet(other)
+        p1 = _boundaries(self._a, self._b)
+        p2 = _boundaries(other._a, other._b)
+        return self._create(*_sweep(p1, p2, pred))
+
+    def __and__(self, other):
+        return self._binary_op(other, lambda x, y: x and y)
+
+    def __or__(self, other):
+        return self._binary_op(other, lambda x, y: x or y)
+
+    def __sub__(self, other):
+        return self._binary_op(other, lambda x, y: x and not y)
+
+    def __xor__(self, other):
+        return self._binary_op(other, lambda x, y: x != y)
+
+    def __iand__(self, other):
+        res = self & other
+        self._a, self._b = res._a, res._b
+        return self
+
+    def __ior__(self, other):
+        res = self | other
+        self._a, self._b = res._a, res._b
+        return self
+
+    def __isub__(self, other):
+        res = self - other
+        self._a, self._b = res._a, res._b
+        return self
+
+    def __ixor__(self, other):
+        res = self ^ other
+        self._a, self._b = res._a, res._b
+        return self
+
+    def __neg__(self):
+        return IntItvSet([Itv(-inf, inf)]) - self
+
+    def __eq__(self, other):
+        if isinstance(other, IntItvSet):
+            return self._a == other._a and self._b == other._b
+        for a, b in zip_longest(self, other):
+            if a is None or b is None or a != b:
+                return False
+        return True
+
+    def __str__(self):
+        tmp = ', '.join(map(str, self))
+        return 'IntItvSet{' + tmp + '}'
+
+    __repr__ = __str__
+
+    def __iter__(self):  # 从小到大返回[a, b)
+        for lo, hi in zip(self._a, self._b):
+            yield _to_itv(lo, hi)
+
+    def __len__(self):
+        return len(self._a)
+
+    def __getitem__(self, i) -> Itv:
+        return _to_itv(self._a[i], self._b[i])
+
+    def copy(self):
+        return self._create(array('q', self._a), array('q', self._b))
@@ -3,34 +3,84 @@
 """
 
 from __future__ import annotations
+import gc
 import random
-from itertools import zip_longest
+from contextlib import contextmanager
+from itertools import islice, zip_longest
 from typing import Tuple, Union
 
 from . import inf
 from .itv import *
+from .itv import _FLOAT_INF, _create_itv, _hash_itv, _length
+from . import itvseq
+from .itvseq import sort_itvs, coalesce
 
 __all__ = [
-    'ItvSet'
+    'ItvSet',
+    'set_default_backend'
 ]
 
+# 批量插入的区间数至少达到该值时，才考虑归并后整体重建
+_BULK_THRESHOLD = 64
+
+# 未指定种子的集合共用的优先级来源，与全局的random互不影响
+_random = random.Random(0x1c1).random
+
+_MASK64 = (1 << 64) - 1
+
+
+class _Owner:
+    """
+    集合的owner，同时携带该集合的优先级来源
+    """
+
+    __slots__ = ('random',)
+
+    def __init__(self, rand=_random):
+        self.random = rand
+
+    def fork(self) -> '_Owner':
+        """
+        副本使用的owner
+        有独立的随机序列时，由当前序列派生一个新的序列，之后两者互不影响；否则共用模块的序列
+        """
+        rand = self.random
+        if rand is not _random:
+            rand = random.Random(rand()).random
+        return _Owner(rand)
+
 
 class Node:
-    def __init__(self, itv: Itv):
+    """
+    节点可以被多个集合共享，只有owner与集合的owner相同时才能原地修改
+    否则需要先clone，即路径复制
+    """
+
+    __slots__ = ('itv', 'priority', 'lch', 'rch', 'size', 'measure', 'fingerprint', 'owner')
+
+    def __init__(self, itv: Itv, owner: _Owner = None):
         self.itv = itv
-        self.priority = random.random()
+        self.priority = _random() if owner is None else owner.random()
         self.lch: 'Node' = None
         self.rch: 'Node' = None
-        self.prnt: 'Node' = None
-
-    @staticmethod
-    def _create(itv, priority, lch=None, rch=None, prnt=None):
-        n = Node.__new__(Node)
-        n.itv = itv
-        n.priority = priority
-        n.lch = lch
-        n.rch = rch
-        n.prnt = prnt
+        self.size = 1   # 子树中的节点数
+        self.measure = None     # 子树中区间的总长度，None表示需要重新计算，见_measure
+        self.fingerprint = None     # 子树中区间hash之和，不取模，None表示需要重新计算，见_fingerprint
+        self.owner = owner
+
+    def clone(self, owner):
+        """
+        复制节点本身，子树共享
+        """
+        n = object.__new__(self.__class__)
+        n.itv = self.itv
+        n.priority = self.priority
+        n.lch = self.lch
+        n.rch = self.rch
+        n.size = self.size
+        n.measure = self.measure
+        n.fingerprint = self.fingerprint
+        n.owner = owner
         return n
 
     @property
@@ -45,45 +95,70 @@ class Node:
     def b(self):
         return self.itv.b
 
-    def is_root(self):
-        return self.prnt is None
+    def update(self):
+        """
+        根据子节点重新计算size，measure和fingerprint在需要时再计算
+        """
+        size = 1
+        lch, rch = self.lch, self.rch
+        if lch is not None:
+            size += lch.size
+        if rch is not None:
+            size += rch.size
+        self.size = size
+        self.measure = None
+        self.fingerprint = None
 
     def set_rch(self, rch: 'Node'):
         self.rch = rch
-        if rch is not None:
-            rch.prnt = self
+        self.update()
 
     def set_lch(self, lch: 'Node'):
         self.lch = lch
-        if lch is not None:
-            lch.prnt = self
+        self.update()
 
     def find(self, x):
         """
         x是一个点，返回落入的区间的节点
         """
-        if x in self.itv:
-            return self
-        if x <= self.k:
-            ch = self.lch
-        else:
-            ch = self.rch
-        if ch is not None:
-            return ch.find(x)
-
-    def find_neareast(self, x):
-        return _find_nearest(self, x)
+        n = self
+        while n is not None:
+            itv = n.itv
+            a = itv.a
+            if x < a or (x == a and itv._flags > 1):
+                n = n.lch
+                continue
+            b = itv.b
+            if x > b or (x == b and itv._flags & 1):
+                n = n.rch
+                continue
+            return n
+
+    def find_nearest(self, x):
+        """
+        x是一个点，返回落入的区间的节点
+        否则返回距离x最近的节点，距离相同时返回左边的
+        """
+        lo, hi = _floor_ceil(self, x)
+        if lo is None or hi is None or lo is hi:
+            return hi if lo is None else lo
+        return hi if _distance(hi.itv, x) < _distance(lo.itv, x) else lo
 
     def find_by_lower(self, x):
         """
         x表示下界，是一个点
         如果落入了某个区间，则返回这个区间
-        否则返回以x为下界的最接近x的区间
+        否则返回x右侧最接近x的区间
         """
-        return _find_by_lower(self, x)
+        return _floor_ceil(self, x)[1]
 
     def find_by_upper(self, x):
-        return _find_by_upper(self, x)
+        """
+        x表示上界，是一个点
+        如果落入了某个区间，则返回这个区间
+        否则返回x左侧最接近x的区间
+        """
+        return _floor_ceil(self, x)[0]
 
     def abc_order_iter(self):
         """
@@ -100,233 +175,669 @@ class Node:
     __iter__ = abc_order_iter
 
     def min(self) -> 'Node':
-        lch = self.lch
-        if lch is None:
-            return self
-        else:
-            return lch.min()
-
-    def max(self) -> 'Node':
-        rch = self.rch
-        if rch is None:
-            return self
-        else:
-            return rch.max()
-
-    def next_low(self):
-        lch = self.lch
-        if lch is not None:
-            return lch.max()
-
-        prnt = self.prnt
         n = self
-        while prnt is not None:
-            if prnt.rch is n:
-                return prnt
-            else:
-                n = prnt
-                prnt = n.prnt
-
-    def next_high(self):
-        rch = self.rch
-        if rch is not None:
-            return rch.min()
+        while n.lch is not None:
+            n = n.lch
+        return n
 
-        prnt = self.prnt
+    def max(self) -> 'Node':
         n = self
-        while prnt is not None:
-            if prnt.lch is n:
-                return prnt
-            else:
-                n = prnt
-                prnt = n.prnt
-
-    def copy(self):
-        return self._copy(None)
-
-    def _copy(self, prnt):
-        n = self._create(self.itv, self.priority, None, None, prnt)
-        if self.lch is not None:
-            n.lch = self.lch._copy(n)
-        if self.rch is not None:
-            n.rch = self.rch._copy(n)
+        while n.rch is not None:
+            n = n.rch
         return n
 
+    def copy(self, owner=None):
+        """
+        深复制整棵子树
+        """
+        root = self.clone(owner)
+        stack = [root]
+        while stack:
+            n = stack.pop()
+            if n.lch is not None:
+                n.lch = n.lch.clone(owner)
+                stack.append(n.lch)
+            if n.rch is not None:
+                n.rch = n.rch.clone(owner)
+                stack.append(n.rch)
+        return root
+
     def height(self):
-        lch,rch = self.lch, self.rch
-        l = 0 if lch is None else lch.height()
-        r = 0 if rch is None else rch.height()
-        return max(l,r)+1
+        """
+        按层遍历
+        """
+        res = 0
+        level = [self]
+        while level:
+            res += 1
+            level = [ch for n in level for ch in (n.lch, n.rch) if ch is not None]
+        return res
 
     def __len__(self):
-        lch,rch = self.lch, self.rch
-        l = 0 if lch is None else len(lch)
-        r = 0 if rch is None else len(rch)
-        return l+r+1
+        return self.size
+
+    def __reduce__(self):
+        """
+        按中序展开为扁平的列，反序列化时O(n)重建，树再深也不会递归
+        """
+        return _restore_tree, (self._tree_build, type(self)) + _tree_columns(self)
 
 
+def _size(n: Node):
+    return 0 if n is None else n.size
 
-def _remove_node(root: Node, n: Node):
-    assert n.lch is None or n.rch is None
-    prnt = n.prnt
 
-    def _set_ch(x):
-        if n is prnt.lch:
-            prnt.set_rch(x)
+def _measure(n: Node):
+    """
+    子树中区间的总长度，与_fingerprint相同，只重新计算measure为None的节点
+    端点不支持减法时(如str)，只有调用时才会抛出异常，不影响建树
+    """
+    if n is None:
+        return 0
+    stack = [n]
+    while stack:
+        m = stack[-1]
+        lch, rch = m.lch, m.rch
+        if lch is not None and lch.measure is None:
+            stack.append(lch)
+        elif rch is not None and rch.measure is None:
+            stack.append(rch)
         else:
-            prnt.set_rch(x)
+            stack.pop()
+            if m.measure is None:
+                itv = m.itv     # 节点中没有空区间，从自身长度开始累加，结果与端点之差的类型一致
+                res = _length(itv.a, itv.b)
+                if lch is not None:
+                    res += lch.measure
+                if rch is not None:
+                    res += rch.measure
+                m.measure = res
+    return n.measure
+
+
+def _fingerprint(n: Node):
+    """
+    子树中区间hash之和，只重新计算fingerprint为None的节点
+    修改时update会使路径上的节点失效，m次单点修改后为O(m log n)，未修改的子树直接复用
+    """
+    if n is None:
+        return 0
+    stack = [n]
+    while stack:
+        m = stack[-1]
+        lch, rch = m.lch, m.rch
+        if lch is not None and lch.fingerprint is None:
+            stack.append(lch)
+        elif rch is not None and rch.fingerprint is None:
+            stack.append(rch)
+        else:
+            stack.pop()
+            if m.fingerprint is None:
+                itv = m.itv     # 同hash(itv)，端点不是无穷时直接计算，只用!=判断，端点可以是任意类型
+                a, b, flags = itv.a, itv.b, itv._flags
+                if -_FLOAT_INF != a != _FLOAT_INF and -_FLOAT_INF != b != _FLOAT_INF:
+                    fp = hash((a, b, flags))
+                else:
+                    fp = _hash_itv(a, b, flags)
+                if lch is not None:
+                    fp += lch.fingerprint
+                if rch is not None:
+                    fp += rch.fingerprint
+                m.fingerprint = fp
+    return n.fingerprint
+
+
+def _pop_max(n: Node, owner=None):
+    """
+    移除最大的节点，返回(新的树, 被移除的节点)
+    沿右侧路径复制不属于owner的节点
+    """
+    root = prnt = None
+    path = []
+    while n.rch is not None:
+        if n.owner is not owner:
+            n = n.clone(owner)
+        if prnt is None:
+            root = n
+        else:
+            prnt.rch = n
+        path.append(n)
+        prnt = n
+        n = n.rch
 
     if prnt is None:
-        if n.lch is None:
-            return n.rch
-        else:
-            return n.lch
+        root = n.lch
     else:
-        if n.lch is None:
-            _set_ch(n.rch)
+        prnt.rch = n.lch
+    for p in reversed(path):
+        p.update()
+    return root, n
+
+
+def _pop_min(n: Node, owner=None):
+    """
+    移除最小的节点，返回(新的树, 被移除的节点)
+    沿左侧路径复制不属于owner的节点
+    """
+    root = prnt = None
+    path = []
+    while n.lch is not None:
+        if n.owner is not owner:
+            n = n.clone(owner)
+        if prnt is None:
+            root = n
         else:
-            _set_ch(n.lch)
-        return root
+            prnt.lch = n
+        path.append(n)
+        prnt = n
+        n = n.lch
+
+    if prnt is None:
+        root = n.rch
+    else:
+        prnt.lch = n.rch
+    for p in reversed(path):
+        p.update()
+    return root, n
 
 
 def _abc_order_iter(n):
-    if n is None:
-        return
-    yield from _abc_order_iter(n.lch)
-    yield n
-    yield from _abc_order_iter(n.rch)
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    while True:
+        while n is not None:
+            push(n)
+            n = n.lch
+        if not stack:
+            return
+        n = pop()
+        yield n
+        n = n.rch
 
 
 def _cba_order_iter(n):
-    if n is None:
-        return
-    yield from _cba_order_iter(n.rch)
-    yield n
-    yield from _cba_order_iter(n.lch)
-
-
-def _iter_from_nearest(self, x, it_next=_abc_order_iter):
-    if self is None:
-        return
-
-    if x in self.itv:
-        yield self
-    if x <= self.k:
-        yield from _iter_from_nearest(self.lch, x)
-        yield self
-        yield from it_next(self.rch)
-    else:
-        yield from _iter_from_nearest(self.rch, x)
-        yield self
-        yield from it_next(self.lch)
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    while True:
+        while n is not None:
+            push(n)
+            n = n.rch
+        if not stack:
+            return
+        n = pop()
+        yield n
+        n = n.lch
 
 
-def _find_nearest(self, x):
-    if self is None:
-        return
+def _floor_ceil(n: Node, x):
+    """
+    x是一个点，下降一次，返回(floor, ceil)两个节点
+    x落入某个区间时两者都是这个区间的节点
+    否则分别为x左侧和右侧最接近x的节点，不存在时为None
+    """
+    lo = hi = None
+    while n is not None:
+        itv = n.itv
+        b = itv.b
+        if x > b or (x == b and itv._flags & 1):
+            lo = n
+            n = n.rch
+            continue
+        a = itv.a
+        if x < a or (x == a and itv._flags > 1):
+            hi = n
+            n = n.lch
+            continue
+        return n, n
+    return lo, hi
+
+
+def _distance(itv: Itv, x):
+    """
+    点x到区间的距离，开端点不影响距离
+    """
+    if itv < x:
+        return 0 if itv.b == x else x - itv.b
+    if itv > x:
+        return 0 if itv.a == x else itv.a - x
+    return 0
 
-    if x in self.itv:
-        return self
-    if x <= self.k:
-        n = _find_nearest(self.lch, x)
-    else:
-        n = _find_nearest(self.rch, x)
-    if n is None:
-        return self
-    return n
 
+def _iter_from_index(n: Node, i):
+    """
+    从第i个节点开始按中序遍历
+    """
+    stack = []
+    while n is not None:
+        l = _size(n.lch)
+        if i < l:
+            stack.append(n)
+            n = n.lch
+        elif i == l:
+            stack.append(n)
+            break
+        else:
+            i -= l + 1
+            n = n.rch
 
-def _find_by_lower(self, x):
-    if self is None:
-        return
+    while stack:
+        n = stack.pop()
+        yield n
+        n = n.rch
+        while n is not None:
+            stack.append(n)
+            n = n.lch
 
-    if x in self.itv:
-        return self
-    if x <= self.k:
-        n = _find_by_lower(self.lch, x)
-        if n is None:
-            return self
-        return n
-    else:
-        return _find_by_lower(self.rch, x)
 
+_left_of = itvseq.left_of
 
-def _find_by_upper(self, x):
-    if self is None:
-        return
 
-    if x in self.itv:
-        return self
-    if x <= self.k:
-        return _find_by_upper(self.lch, x)
-    else:
-        n = _find_by_upper(self.rch, x)
-        if n is None:
-            return self
-        return n
+def _count_left_of(n: Node, itv: Itv):
+    """
+    完全位于itv左侧的节点数
+    """
+    res = 0
+    while n is not None:
+        if _left_of(n.itv, itv):
+            res += _size(n.lch) + 1
+            n = n.rch
+        else:
+            n = n.lch
+    return res
 
 
-def _split(n: Node, x, is_open=False, t1=None, t2=None) -> Union[Tuple[None, None], Tuple[Node, Node]]:
-    if n is None:
-        return None, None
-
-    def to_t1():
-        nonlocal t1, t2
-        t1 = n
-        rch, t2 = _split(n.rch, x, is_open, n.rch, t2)
-        n.set_rch(rch)
-
-    def to_t2():
-        nonlocal t1, t2
-        t2 = n
-        t1, lch = _split(n.lch, x, is_open, n.lch, t1)
-        n.set_lch(lch)
-
-    if n.itv.a <= x:
-        if is_open and n.itv.left_open and n.itv.a == x:
-            to_t2()
+def _count_not_right_of(n: Node, itv: Itv):
+    """
+    不完全位于itv右侧的节点数
+    """
+    res = 0
+    while n is not None:
+        if _left_of(itv, n.itv):
+            n = n.lch
         else:
-            to_t1()
-    else:
-        to_t2()
+            res += _size(n.lch) + 1
+            n = n.rch
+    return res
+
+
+def _range_measure(n: Node, lo, hi):
+    """
+    下标在[lo, hi)内的区间的总长度，O(log n)，须lo < hi
+    只做加法，避免inf - inf，也不与整数0相加，端点之差可以是timedelta等类型
+    """
+    # 找到lo和hi分叉的节点
+    while n is not None:
+        l = _size(n.lch)
+        if hi <= l:
+            n = n.lch
+        elif lo > l:
+            lo -= l + 1
+            hi -= l + 1
+            n = n.rch
+        else:
+            break
+    itv = n.itv
+    res = _length(itv.a, itv.b)
+    # 左子树中下标>=lo的部分
+    m, i = n.lch, lo
+    while m is not None:
+        l = _size(m.lch)
+        if i <= l:
+            itv = m.itv
+            res += _length(itv.a, itv.b)
+            if m.rch is not None:
+                res += _measure(m.rch)
+            m = m.lch
+        else:
+            i -= l + 1
+            m = m.rch
+    # 右子树中下标<hi的部分
+    m, i = n.rch, hi - _size(n.lch) - 1
+    while m is not None:
+        l = _size(m.lch)
+        if i > l:
+            itv = m.itv
+            res += _length(itv.a, itv.b)
+            if m.lch is not None:
+                res += _measure(m.lch)
+            i -= l + 1
+            m = m.rch
+        else:
+            m = m.lch
+    return res
+
+
+def _iter_overlapping(n: Node, itv: Itv):
+    """
+    按中序返回与itv相交的节点，O(log n + k)
+    """
+    # 下降一次，栈中保存第一个不在itv左侧的节点及其之后的祖先
+    stack = []
+    while n is not None:
+        if _left_of(n.itv, itv):
+            n = n.rch
+        else:
+            stack.append(n)
+            n = n.lch
+
+    while stack:
+        n = stack.pop()
+        if not n.itv.intersect(itv):
+            return
+        yield n
+        n = n.rch
+        while n is not None:
+            stack.append(n)
+            n = n.lch
+
+
+def _split(n: Node, x, is_open=False, owner=None) -> Union[Tuple[None, None], Tuple[Node, Node]]:
+    """
+    按下界分裂为t1和t2，下界<=x的节点属于t1
+    is_open为True时，下界为开且等于x的节点属于t2
+    自顶向下迭代，路径上不属于owner的节点会被复制，最后沿路径自底向上更新size
+    """
+    t1 = t2 = None
+    l = r = None    # t1的最右节点，t2的最左节点
+    path = []
+    while n is not None:
+        if n.owner is not owner:
+            n = n.clone(owner)
+        path.append(n)
+        itv = n.itv
+        a = itv.a
+        if a < x or (a == x and not (is_open and itv._flags > 1)):
+            if l is None:
+                t1 = n
+            else:
+                l.rch = n
+            l = n
+            n = n.rch
+        else:
+            if r is None:
+                t2 = n
+            else:
+                r.lch = n
+            r = n
+            n = n.lch
+
+    if l is not None:
+        l.rch = None
+    if r is not None:
+        r.lch = None
+    for n in reversed(path):
+        n.update()
     return t1, t2
 
 
-def _merge(t1: Node, t2: Node) -> Node:
+def _merge(t1: Node, t2: Node, owner=None) -> Node:
+    """
+    t1中的区间全部在t2左边
+    路径上不属于owner的节点会被复制
+    """
     if t1 is None:
         return t2
     if t2 is None:
         return t1
 
-    if t1.priority > t2.priority:
-        t1.set_rch(_merge(t1.rch, t2))
-        return t1
+    root = prnt = None
+    to_right = False    # 下一个节点挂在prnt的右边
+    path = []
+    while t1 is not None and t2 is not None:
+        from_t1 = t1.priority > t2.priority
+        n = t1 if from_t1 else t2
+        if n.owner is not owner:
+            n = n.clone(owner)
+        if prnt is None:
+            root = n
+        elif to_right:
+            prnt.rch = n
+        else:
+            prnt.lch = n
+        path.append(n)
+        # n来自t1时，剩余部分合并到n的右子树，否则合并到左子树
+        if from_t1:
+            t1 = n.rch
+        else:
+            t2 = n.lch
+        prnt = n
+        to_right = from_t1
+
+    rest = t2 if t1 is None else t1
+    if to_right:
+        prnt.rch = rest
     else:
-        t2.set_lch(_merge(t1, t2.lch))
-        return t2
+        prnt.lch = rest
+    for n in reversed(path):
+        n.update()
+    return root
+
+
+def _join(t1: Node, n: Node, t2: Node, owner=None) -> Node:
+    """
+    t1中的区间全部在n左边，t2中的区间全部在n右边
+    """
+    return _merge(_merge(t1, n, owner), t2, owner)
+
+
+def _build(itvs, owner=None, create=Node) -> Node:
+    """
+    itvs须按下界有序且互不相交，create(itv, owner)用于创建节点
+    使用栈构建笛卡尔树，O(n)
+    """
+    stack = []
+    for itv in itvs:
+        n = create(itv, owner)
+        last = None
+        while stack and stack[-1].priority < n.priority:
+            last = stack.pop()
+            last.update()   # 出栈时右子树已经确定
+        n.set_lch(last)
+        if stack:
+            stack[-1].set_rch(n)
+        stack.append(n)
+    for n in reversed(stack):
+        n.update()
+    if stack:
+        return stack[0]
+
+
+def _tree_columns(n: Node):
+    """
+    按中序把子树展开为(端点a的列表, 端点b的列表, 边界标志)
+    """
+    a, b, flags = [], [], bytearray()
+    for m in _abc_order_iter(n):
+        itv = m.itv
+        a.append(itv.a)
+        b.append(itv.b)
+        flags.append(itv.kind)
+    return a, b, bytes(flags)
+
+
+def _columns_itvs(a, b, flags):
+    """
+    _tree_columns的逆操作
+    """
+    return map(_create_itv, a, b, [f > 1 for f in flags], [f & 1 == 1 for f in flags])
+
+
+@contextmanager
+def _gc_paused():
+    """
+    一次创建大量节点时暂停垃圾回收
+    否则每次完整回收都要扫描已经创建的全部节点，10^6个区间时重建慢约3倍
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _restore_tree(build, create, a, b, flags):
+    with _gc_paused():
+        return build(_columns_itvs(a, b, flags), None, create)
+
+
+def _restore_itvset(cls, a, b, flags):
+    with _gc_paused():
+        return cls._from_disjoint(_columns_itvs(a, b, flags))
+
+
+Node._tree_build = staticmethod(_build)
+
+
+def _range_itv(lo, hi, inclusive):
+    """
+    irange的参数转为区间
+    """
+    lo = -inf if lo is None else lo
+    hi = inf if hi is None else hi
+    return Itv(lo, hi, '(['[inclusive[0]] + ')]'[inclusive[1]])
+
+
+def _use_bulk(n, m):
+    """
+    向n个区间的集合中插入或移除m个区间时，是否应当线性扫描后整体重建
+    逐个处理的代价约为m*log(n)，整体重建约为n+m
+    """
+    return m >= _BULK_THRESHOLD and 4 * m * n.bit_length() >= n
+
+
+class _hybridmethod:
+    """
+    通过类调用时为classmethod，通过实例调用时为普通方法
+    """
+
+    def __init__(self, fclass, finstance):
+        self.fclass = fclass
+        self.finstance = finstance
+
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self.fclass.__get__(cls, type(cls))
+        return self.finstance.__get__(obj, cls)
+
+
+# 除ItvSet外，同样按下界有序且互不相交的集合类型，由对应模块注册
+_sorted_set_types = ()
+
+# 补集视图类型，由itvset_complement注册；作为右操作数时交给它的反射方法处理，保持惰性
+_complement_types = ()
+
+# 后端名称到ItvSet子类的映射，由对应模块注册
+_backends = {}
+_default_backend = 'treap'
+
+
+def set_default_backend(name: str):
+    """
+    设置ItvSet(...)默认使用的后端，例如'treap', 'avl'
+    """
+    global _default_backend
+    _backend_class(ItvSet, name)
+    _default_backend = name
+
+
+def _backend_class(cls, backend=None):
+    """
+    直接使用ItvSet构造时，按backend或默认后端选择实现，子类不受影响
+    """
+    if cls is not ItvSet:
+        return cls
+    name = _default_backend if backend is None else backend
+    try:
+        return _backends[name]
+    except KeyError:
+        raise ValueError(f'unknown ItvSet backend: {name!r}') from None
+
+
+def _as_sorted(s):
+    """
+    ItvSet及补集视图本身即为有序且互不相交的序列，其他可迭代对象需要先排序合并
+    """
+    if isinstance(s, ItvSet) or isinstance(s, _sorted_set_types) or isinstance(s, _complement_types):
+        return s
+    return list(coalesce(sort_itvs(s)))
 
 
 class ItvSet:
     """
     interval set
+    默认使用treap实现，其他后端为ItvSet的子类，只替换节点类型和树操作
     """
 
-    def __init__(self, iterable=None):
+    _node = Node
+    _split = staticmethod(_split)
+    _merge = staticmethod(_merge)
+    _build = staticmethod(_build)
+    _join = staticmethod(_join)
+    _pop_max = staticmethod(_pop_max)
+    _pop_min = staticmethod(_pop_min)
+
+    def __new__(cls, iterable=None, backend=None, seed=None):
+        return object.__new__(_backend_class(cls, backend))
+
+    def __init__(self, iterable=None, backend=None, seed=None):
         """
         iterable中的元素类型为Itv
+        backend为None时使用默认后端，见set_default_backend
+        seed为treap优先级的种子，给出时该集合使用独立的随机序列，树的形状可以复现
+        副本的序列在copy时由原集合的序列派生，修改副本不影响原集合的序列
         """
         self._root: Node = None
+        # 只有owner为此对象的节点可以被原地修改
+        self._owner = _Owner() if seed is None else _Owner(random.Random(seed).random)
+        self._arr = None    # 列式存储的缓存，修改集合时失效
         if iterable is None:
             return
-        for itv in iterable:
-            self.add(itv)
+        self._set_root(self._build(coalesce(sort_itvs(iterable)), self._owner))
 
-    @staticmethod
-    def _create(root):
-        new_ = ItvSet.__new__(ItvSet)
+    @classmethod
+    def _create(cls, root, owner=None):
+        new_ = object.__new__(cls)
         new_._root = root
+        new_._owner = _Owner() if owner is None else owner
+        new_._arr = None
         return new_
 
+    @classmethod
+    def _from_disjoint(cls, itvs):
+        """
+        itvs须按下界有序且互不相交
+        """
+        owner = _Owner()
+        return cls._create(cls._build(itvs, owner), owner)
+
+    def _set_root(self, root):
+        """
+        所有修改都通过此方法替换根节点，并使缓存失效
+        """
+        self._root = root
+        self._arr = None
+
+    @classmethod
+    def from_sorted(cls, itvs):
+        """
+        itvs须按下界有序，相交或紧挨着的区间会被合并
+        O(n)
+        """
+        return _backend_class(cls)._from_disjoint(coalesce(itvs))
+
+    @classmethod
+    def from_iterable(cls, iterable, presorted=False):
+        """
+        presorted为True时跳过排序
+        """
+        if presorted:
+            return cls.from_sorted(iterable)
+        return cls.from_sorted(sort_itvs(iterable))
+
     def add(self, itv: Itv):
         """
         插入区间，并且合并相交的区间
@@ -334,82 +845,147 @@ class ItvSet:
         if itv.empty():
             return
 
-        if self._root is None:
-            self._root = Node(itv)
-            return
+        owner = self._owner
+        t1, t2 = self._split(self._root, itv.a, True, owner)
+        t2, t3 = self._split(t2, itv.b, itv.right_open, owner)
 
-        root = self._root
+        # t1中只有最大的区间可能与itv紧挨着，t2中的区间全部被itv合并
+        if t1 is not None and itv.intersect_or_near(t1.max().itv):
+            t1, n = self._pop_max(t1, owner)
+            itv |= n.itv
+        if t2 is not None:
+            itv |= t2.max().itv
 
+        self._set_root(self._merge(self._merge(t1, self._node(itv, owner), owner), t3, owner))
 
-        t1, t2, t3 = None, None, None
-        t1, t2 = _split(root, itv.a)
-        if t2 is not None:
-            t2, t3 = _split(t2, itv.b, itv.right_open)
+    def remove(self, itv: Itv):
+        """
+        移除区间
+        """
+        if itv.empty() or self.empty():
+            return
 
-        create_flag = True
-        if t1 is not None:
-            t1_max = t1.max()
-            if itv.intersect_or_near(t1_max.itv):
-                itv |= t1_max.itv
-                t1_max.itv = itv
-                create_flag = False
+        owner = self._owner
+        t1, t2 = self._split(self._root, itv.a, False, owner)
+        t2, t3 = self._split(t2, itv.b, itv.right_open, owner)
 
+        # t1中只有最大的区间可能与itv相交，剩余部分为v1, v2
+        v1 = v2 = None
+        if t1 is not None and t1.max().itv.intersect(itv):
+            t1, n = self._pop_max(t1, owner)
+            v1, v2 = n.itv - itv
+
+        # t2中只有最大的区间可能超出itv
         if t2 is not None:
-            t2_max = t2.max()
-            if itv.intersect_or_near(t2_max.itv):
-                itv |= t2_max.itv
-                if not create_flag:
-                    t1_max.itv = itv
+            t2_max = t2.max().itv
+            tmp = t2_max - itv
+            if tmp is t2_max:   # 下界与itv的上界重合但不相交，保留
+                v2 = tmp
+            else:
+                v2 = tmp[1]
 
-        n = None
-        if create_flag:
-            n = Node(itv)
+        for v in (v1, v2):
+            if v is not None and not v.empty():
+                t1 = self._merge(t1, self._node(v, owner), owner)
+        self._set_root(self._merge(t1, t3, owner))
 
-        self._root = _merge(_merge(t1, n), t3)
+    def add_many(self, iterable):
+        """
+        批量插入区间，先排序合并，再一次性并入树中
+        O(m log(n/m + 1))，m较大时线性归并后整体重建
+        """
+        self._add_sorted(list(coalesce(sort_itvs(iterable))))
 
-        return
+    def remove_many(self, iterable):
+        """
+        批量移除区间，复杂度同add_many
+        """
+        self._remove_sorted(list(coalesce(sort_itvs(iterable))))
 
-    def remove(self, itv: Itv):
+    def _add_sorted(self, itvs: list):
         """
-        移除区间
+        itvs须按下界有序且互不相交
         """
-        if itv.empty() or self.empty():
+        if not itvs:
             return
+        if _use_bulk(len(self), len(itvs)):
+            self._set_root(self._build(itvseq.union(self, itvs), self._owner))
+        else:
+            self._set_root(self._union(self._root, itvs, 0, len(itvs)))
 
-        root = self._root
+    def _remove_sorted(self, itvs: list):
+        if not itvs or self.empty():
+            return
+        if _use_bulk(len(self), len(itvs)):
+            self._set_root(self._build(itvseq.difference(self, itvs), self._owner))
+        else:
+            self._set_root(self._difference(self._root, itvs, 0, len(itvs)))
 
-        t1, t2, t3 = None, None, None
-        t1, t2 = _split(root, itv.a)
+    def _union(self, t: Node, itvs: list, lo, hi) -> Node:
+        """
+        将itvs[lo:hi]并入t
+        以中间的区间分裂t，两侧递归处理后再连接，递归深度为O(log m)
+        """
+        if lo >= hi:
+            return t
+        owner = self._owner
+        if t is None:
+            return self._build(itvs[lo:hi], owner)
+
+        mid = (lo + hi) // 2
+        itv = itvs[mid]
+        t1, t2 = self._split(t, itv.a, True, owner)
+        t2, t3 = self._split(t2, itv.b, itv.right_open, owner)
+        if t1 is not None and itv.intersect_or_near(t1.max().itv):
+            t1, n = self._pop_max(t1, owner)
+            itv |= n.itv
         if t2 is not None:
-            t2, t3 = _split(t2, itv.b, itv.right_open)
-
-        n = None
-        if t1 is not None:
-            t1_max = t1.max()
-            tmp = t1_max.itv - itv
-            if tmp is not t1_max.itv:
-                v1, v2 = tmp
-                if not v1.empty():  # v1不空
-                    t1_max.itv = v1
-                    if not v2.empty():
-                        n = Node(v2)
-                elif v2.empty():  # v1和v2都空
-                    t1 = _remove_node(t1, t1_max)
-                else:  # v1空，v2不空
-                    t1_max.itv = v2
-
+            itv |= t2.max().itv
+
+        l = self._union(t1, itvs, lo, mid)
+        r = self._union(t3, itvs, mid + 1, hi)
+        # itv合并树中的区间后变大，可能与两侧并入的区间相交或紧挨着
+        while l is not None and itv.intersect_or_near(l.max().itv):
+            l, n = self._pop_max(l, owner)
+            itv |= n.itv
+        while r is not None and itv.intersect_or_near(r.min().itv):
+            r, n = self._pop_min(r, owner)
+            itv |= n.itv
+        return self._join(l, self._node(itv, owner), r, owner)
+
+    def _difference(self, t: Node, itvs: list, lo, hi) -> Node:
+        """
+        从t中移除itvs[lo:hi]，分治方式同_union
+        """
+        if lo >= hi or t is None:
+            return t
+        owner = self._owner
+
+        mid = (lo + hi) // 2
+        itv = itvs[mid]
+        # 与_union相同，下界为开且等于itv.a的节点放入t2，它可能不与itv相交，但会经t2_max放入t3
+        t1, t2 = self._split(t, itv.a, True, owner)
+        t2, t3 = self._split(t2, itv.b, itv.right_open, owner)
+
+        # 与remove相同，被itv截断后的剩余部分放回两侧，以便被两侧的区间继续移除
+        v1 = v2 = None
+        if t1 is not None and t1.max().itv.intersect(itv):
+            t1, n = self._pop_max(t1, owner)
+            v1, v2 = n.itv - itv
         if t2 is not None:
-            t2_max = t2.max()
-            tmp = t2_max.itv - itv
-            if tmp is not t2_max.itv:
-                v1, v2 = tmp
-                assert v1.empty()
-                if not v2.empty():
-                    assert n is None
-                    n = Node(v2)
-        self._root = _merge(_merge(t1, n), t3)
-
-    def intersection(self, itv: 'Itv'):
+            t2_max = t2.max().itv
+            tmp = t2_max - itv
+            v2 = tmp if tmp is t2_max else tmp[1]
+        if v1 is not None and not v1.empty():
+            t1 = self._merge(t1, self._node(v1, owner), owner)
+        if v2 is not None and not v2.empty():
+            t3 = self._merge(self._node(v2, owner), t3, owner)
+
+        l = self._difference(t1, itvs, lo, mid)
+        r = self._difference(t3, itvs, mid + 1, hi)
+        return self._merge(l, r, owner)
+
+    def _intersect_itv(self, itv: 'Itv'):
         """
         和区间取交集
         """
@@ -418,33 +994,107 @@ class ItvSet:
             return
 
         if itv.empty():
-            self._root = None
+            self._set_root(None)
+            return
 
-        t1, t2, t3 = None, None, None
-        t1, t2 = _split(root, itv.a)
-        if t2 is not None:
-            t2, t3 = _split(t2, itv.b, itv.right_open)
+        owner = self._owner
+        t1, t2 = self._split(root, itv.a, False, owner)
+        t2, t3 = self._split(t2, itv.b, itv.right_open, owner)
 
         n = None
         if t1 is not None:
-            t1_max = t1.max()
-            tmp = t1_max.itv & itv
+            tmp = t1.max().itv & itv
             if not tmp.empty():
-                n = Node(tmp)
+                n = self._node(tmp, owner)
 
+        # t2中只有最大的区间可能超出itv
         if t2 is not None:
-            t2_max = t2.max()
-            t2_max.itv &= itv
-            if t2_max.itv.empty():
-                t2 = _remove_node(t2, t2_max)
+            t2, t2_max = self._pop_max(t2, owner)
+            tmp = t2_max.itv & itv
+            if not tmp.empty():
+                t2 = self._merge(t2, self._node(tmp, owner), owner)
+
+        self._set_root(self._merge(n, t2, owner))
 
-        self._root = _merge(n, t2)
+    def _intersection_all(cls, *sets):
+        """
+        多个集合的交集，返回新的集合，不修改参数，O(N log k)
+        """
+        return _backend_class(cls).from_sorted(itvseq.intersection_all(*map(_as_sorted, sets)))
+
+    def _intersection_into(self, *args):
+        """
+        原地与多个集合取交集，返回self
+        参数只有一个Itv时直接按区间裁剪，O(log n)；否则与union相同，k路归并后整体重建
+        """
+        if len(args) == 1 and isinstance(args[0], Itv):
+            self._intersect_itv(args[0])
+            return self
+        others = [[x] if isinstance(x, Itv) else _as_sorted(x) for x in args]
+        self._set_root(self._build(itvseq.intersection_all(self, *others), self._owner))
+        return self
+
+    # ItvSet.intersection(s1, s2, ...)返回新的集合，s.intersection(itv)或s.intersection(s1, ...)原地修改s
+    intersection = _hybridmethod(_intersection_all, _intersection_into)
 
     def empty(self):
         return self._root is None
 
+    def _array(self):
+        from .itvarray import ItvArray
+
+        arr = self._arr
+        if arr is None:
+            arr = self._arr = ItvArray.from_itvs(self)
+        return arr
+
+    def contains_many(self, points):
+        """
+        批量判定点是否在集合内，返回bool数组
+        需要numpy，端点数组会被缓存直到下一次修改
+        """
+        return self._array().contains(points)
+
+    def locate_many(self, points):
+        """
+        批量查找点所在区间的下标(与kth一致)，不在集合内的点为-1
+        """
+        return self._array().locate(points)
+
+    def freeze(self):
+        """
+        返回内容相同的只读FrozenItvSet
+        """
+        from .itvset_frozen import FrozenItvSet
+
+        new_ = FrozenItvSet._create(self._array())
+        new_._fingerprint = self.fingerprint()
+        return new_
+
+    def save(self, path):
+        """
+        以列式二进制格式写入文件，需要numpy
+        FrozenItvSet.load可以零复制地映射该文件
+        """
+        self._array().save(path)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        读取save写入的文件，整体构建为可修改的集合，O(n)
+        """
+        from .itvarray import ItvArray
+
+        with _gc_paused():
+            return _backend_class(cls)._from_disjoint(ItvArray.load(path, mmap))
+
     def __neg__(self):
-        return ItvSet([Itv(-inf, inf)]) - self
+        """
+        返回补集的视图，不复制
+        """
+        from .itvset_complement import ItvSetComplement
+
+        return ItvSetComplement(self)
 
     def __contains__(self, x):
         """
@@ -459,46 +1109,57 @@ class ItvSet:
         """
         相交集合
         """
-        res = self & other
-        self._root = res._root
+        self._set_root(self._build(itvseq.intersection(self, _as_sorted(other)), self._owner))
         return self
 
     def __ior__(self, s: 'ItvSet'):
         """
         合并集合
         """
-        for v in s:
-            self.add(v)
+        self._add_sorted(list(_as_sorted(s)))
         return self
 
     def __isub__(self, s: 'ItvSet'):
         """
         减去集合
         """
-        for v in s:
-            self.remove(v)
+        self._remove_sorted(list(_as_sorted(s)))
+        return self
+
+    def __ixor__(self, other: 'ItvSet'):
+        """
+        对称差
+        """
+        self._set_root(self._build(itvseq.symmetric_difference(self, _as_sorted(other)), self._owner))
         return self
 
     def __and__(self, other):
-        tmp = []
-        for v in other:
-            x = self.copy()
-            x.intersection(v)
-            tmp.append(x)
-        res = ItvSet.union(*tmp)
-        return res
+        if isinstance(other, _complement_types):
+            return NotImplemented
+        return self._from_disjoint(itvseq.intersection(self, _as_sorted(other)))
 
     def __or__(self, other):
-        res = self.copy()
-        res |= other
-        return res
+        if isinstance(other, _complement_types):
+            return NotImplemented
+        return self._from_disjoint(itvseq.union(self, _as_sorted(other)))
 
     def __sub__(self, other):
-        res = self.copy()
-        res -= other
-        return res
+        if isinstance(other, _complement_types):
+            return NotImplemented
+        return self._from_disjoint(itvseq.difference(self, _as_sorted(other)))
+
+    def __xor__(self, other):
+        if isinstance(other, _complement_types):
+            return NotImplemented
+        return self._from_disjoint(itvseq.symmetric_difference(self, _as_sorted(other)))
 
     def __eq__(self, other):
+        """
+        对方也是有序的区间集合时，先比较大小和指纹，不同则O(1)返回
+        """
+        if isinstance(other, ItvSet) or isinstance(other, _sorted_set_types):
+            if len(self) != len(other) or self.fingerprint() != other.fingerprint():
+                return False
         for a, b in zip_longest(self, other):
             if a is None or b is None or a != b:
                 return False
@@ -515,22 +1176,230 @@ class ItvSet:
             yield n.itv
 
     def __len__(self):
-        return len(self._root)
+        return _size(self._root)
 
-    def union(self, *args):
+    def __getitem__(self, i):
         """
-        取多个集合的并集
+        i为整数时返回第i个区间
+        i为切片时返回对应区间组成的ItvSet
         """
-        for arg in args:
-            self|=arg
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step == 1:
+                it = (n.itv for n in _iter_from_index(self._root, start))
+                itvs = islice(it, max(stop - start, 0))
+            else:
+                itvs = sorted((self.kth(j) for j in range(start, stop, step)), key=itvseq.lower_key)
+            return self._from_disjoint(itvs)
+        return self.kth(i)
+
+    def kth(self, i) -> Itv:
+        """
+        返回第i个区间（从0开始，支持负数），O(log n)
+        """
+        size = len(self)
+        if i < 0:
+            i += size
+        if not 0 <= i < size:
+            raise IndexError('ItvSet index out of range')
+
+        n = self._root
+        while True:
+            l = _size(n.lch)
+            if i < l:
+                n = n.lch
+            elif i == l:
+                return n.itv
+            else:
+                i -= l + 1
+                n = n.rch
+
+    def rank(self, x) -> int:
+        """
+        完全位于点x左侧的区间个数，O(log n)
+        若x落在集合内，则x所在的区间为self.kth(self.rank(x))
+        """
+        res = 0
+        n = self._root
+        while n is not None:
+            itv = n.itv
+            b = itv.b
+            if x > b or (x == b and itv._flags & 1):
+                res += _size(n.lch) + 1
+                n = n.rch
+            else:
+                n = n.lch
+        return res
+
+    def floor(self, x):
+        """
+        x所在的区间，x不在集合内时返回x左侧最近的区间，没有则返回None，O(log n)
+        """
+        n = _floor_ceil(self._root, x)[0]
+        return None if n is None else n.itv
+
+    def ceil(self, x):
+        """
+        x所在的区间，x不在集合内时返回x右侧最近的区间，没有则返回None，O(log n)
+        """
+        n = _floor_ceil(self._root, x)[1]
+        return None if n is None else n.itv
+
+    def nearest(self, x):
+        """
+        距离点x最近的区间，距离相同时返回左边的，集合为空时返回None，O(log n)
+        """
+        n = self._root
+        return None if n is None else n.find_nearest(x).itv
+
+    def distance(self, x):
+        """
+        点x到集合的距离，x在集合内时为0，集合为空时为inf，O(log n)
+        """
+        v = self.nearest(x)
+        return inf if v is None else _distance(v, x)
+
+    def successor(self, itv: Itv):
+        """
+        完全位于itv右侧的第一个区间，itv为空集或没有这样的区间时返回None，O(log n)
+        itv为集合中的区间时即下一个区间
+        """
+        if itv.empty():
+            return None
+        res = None
+        n = self._root
+        while n is not None:
+            if _left_of(itv, n.itv):
+                res = n
+                n = n.lch
+            else:
+                n = n.rch
+        return None if res is None else res.itv
+
+    def predecessor(self, itv: Itv):
+        """
+        完全位于itv左侧的最后一个区间，itv为空集或没有这样的区间时返回None，O(log n)
+        itv为集合中的区间时即上一个区间
+        """
+        if itv.empty():
+            return None
+        res = None
+        n = self._root
+        while n is not None:
+            if _left_of(n.itv, itv):
+                res = n
+                n = n.rch
+            else:
+                n = n.lch
+        return None if res is None else res.itv
+
+    def fingerprint(self) -> int:
+        """
+        与插入顺序和树的形状无关的指纹：各区间hash之和 mod 2^64
+        内容相同的集合指纹一定相同，指纹不同则集合一定不同
+        结果缓存在节点中，修改后只重新计算修改过的路径，未修改时O(1)
+        """
+        return _fingerprint(self._root) & _MASK64
+
+    def measure(self, window: Itv = None):
+        """
+        集合覆盖的总长度，修改后第一次调用时只重新计算路径上失效的节点，未修改时O(1)
+        给出window时只计算落在window内的长度，O(log n)
+        空集为0，否则结果类型与端点之差一致
+        """
+        root = self._root
+        if window is None:
+            return _measure(root)
+        if root is None or window.empty():
+            return 0
+
+        # 下标在[lo, hi)内的区间与window相交，只有首尾两个可能部分落在window外
+        lo = _count_left_of(root, window)
+        hi = _count_not_right_of(root, window)
+        if lo >= hi:
+            return 0
+        res = (self.kth(lo) & window).length()
+        if hi - lo > 2:
+            res += _range_measure(root, lo + 1, hi - 1)
+        if hi - lo > 1:
+            res += (self.kth(hi - 1) & window).length()
+        return res
+
+    def overlapping(self, itv: Itv):
+        """
+        按顺序返回与itv相交的区间，O(log n + k)
+        """
+        for n in _iter_overlapping(self._root, itv):
+            yield n.itv
+
+    def irange(self, lo=None, hi=None, inclusive=(True, True)):
+        """
+        按顺序返回与[lo, hi]相交的区间，None表示无界
+        inclusive表示lo和hi是否包含在范围内
+        """
+        return self.overlapping(_range_itv(lo, hi, inclusive))
+
+    def clip(self, itv: Itv):
+        """
+        按顺序返回与itv的交集，即被itv裁剪后的区间
+        """
+        for v in self.overlapping(itv):
+            yield v & itv
+
+    def _gaps_overlapping(self, itv: Itv):
+        """
+        按顺序返回与itv相交的空隙，不裁剪，O(log n + k)
+        """
+        i = _count_left_of(self._root, itv)
+        it = (n.itv for n in _iter_from_index(self._root, max(i - 1, 0)))
+        return itvseq.gaps(it, itv)
+
+    def iter_gaps(self, window: Itv = None):
+        """
+        按顺序返回window内不被集合覆盖的部分，None表示整个数轴
+        O(log n + k)，k为window内的空隙数
+        """
+        if window is None:
+            window = Itv(-inf, inf)
+        for g in self._gaps_overlapping(window):
+            yield g & window
+
+    def _union_all(cls, *sets):
+        """
+        多个集合的并集，返回新的集合，不修改参数
+        k路归并后合并，最后整体构建，O(N log k)
+        """
+        return _backend_class(cls)._from_disjoint(itvseq.union_all(*map(_as_sorted, sets)))
+
+    def _union_into(self, *args):
+        """
+        将多个集合并入self，返回self
+        参数先k路归并，再作为一批区间并入
+        """
+        self._add_sorted(list(itvseq.union_all(*map(_as_sorted, args))))
         return self
 
+    # ItvSet.union(s1, s2, ...)返回新的集合，s.union(s1, s2, ...)原地修改s
+    union = _hybridmethod(_union_all, _union_into)
     or_ = union
 
     def copy(self):
-        if self._root is None:
-            root = None
-        else:
-            root = self._root.copy()
+        """
+        O(1)，两个集合共享所有节点，之后各自修改时按路径复制
+        """
+        owner = self._owner
+        self._owner = _Owner(owner.random)
+        new_ = self._create(self._root, owner.fork())
+        new_._arr = self._arr
+        return new_
+
+    __copy__ = copy
+
+    def __reduce__(self):
+        """
+        序列化为三列扁平数据，反序列化时整体构建，O(n)
+        """
+        return _restore_itvset, (type(self),) + _tree_columns(self._root)
+
 
-        return self._create(root)
+_backends['treap'] = ItvSet
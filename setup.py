@@ -7,6 +7,7 @@ setup(
     packages=['icl'],
     package_dir={'icl': 'inc/icl'},
     install_requires=['infinity>=1.5'],
+    extras_require={'numpy': ['numpy']},
     python_requires='>=3.8',
 
     url='https://github.com/happyxianyu/icl',
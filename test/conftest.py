@@ -0,0 +1,25 @@
+import random
+
+from icl import *
+
+
+def random_itvs(n, seed, hi=100):
+    """
+    n个下界在[0, hi]内、长度不超过10的区间，开闭随机
+    使用独立的Random，不改变全局random的状态
+    """
+    rnd = random.Random(seed)
+    kinds = ['()', '(]', '[)', '[]']
+    res = []
+    for _ in range(n):
+        a = rnd.randint(0, hi)
+        b = a + rnd.randint(0, 10)
+        res.append(Itv(a, b, rnd.choice(kinds)))
+    return res
+
+
+def same_itv(v1, v2):
+    """
+    比较两个可能为None的区间，Itv不能与None比较
+    """
+    return v1 is v2 or (v1 is not None and v2 is not None and v1 == v2)
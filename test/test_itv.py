@@ -1,5 +1,7 @@
 import random
 
+import pytest
+
 from icl import *
 
 
@@ -26,18 +28,15 @@ def test_and():
     res = a & b
     assert res.empty()
 
-    a, b = Itv(0, 1, '()'), Itv(1, 2, '()')
-    a.right_open = False
+    a, b = Itv(0, 1, '(]'), Itv(1, 2, '()')
     res = a & b
     assert res.empty()
 
-    a, b = Itv(0, 1, '()'), Itv(1, 2, '()')
-    b.right_open = False
+    a, b = Itv(0, 1, '()'), Itv(1, 2, '(]')
     res = a & b
     assert res.empty()
 
-    a, b = Itv(0, 1, '(]'), Itv(1, 2, '[)')
-    b.right_open = False
+    a, b = Itv(0, 1, '(]'), Itv(1, 2, '[]')
     res = a & b
     print(res)
     assert not res.empty()
@@ -56,3 +55,46 @@ def test_splits():
     print(idxs)
     res = v.splits(idxs)
     print(res)
+
+
+def test_immutable():
+    import copy
+    import pickle
+
+    v = Itv(1, 5, '(]')
+    for attr in ['a', 'b', 'left_open', 'right_open', 'kind']:
+        with pytest.raises(AttributeError):
+            setattr(v, attr, 0)
+    with pytest.raises(AttributeError):
+        v.c = 0
+    assert not hasattr(v, '__dict__')
+
+    assert (v.a, v.b, v.left_open, v.right_open) == (1, 5, True, False)
+    assert v.create_like(right_open=True) == Itv(1, 5, '()')
+    assert hash(v) == hash(Itv(1, 5, '(]'))
+    assert hash(Itv(-inf, inf)) == hash(Itv(-float('inf'), float('inf')))
+    assert hash(Itv(1, 5.0)) == hash(Itv(1.0, 5))
+    assert hash(Itv('a', 'c')) == hash(Itv('a', 'c', '[]')) != hash(Itv('a', 'c', '()'))
+    assert hash(Itv(inf, inf)) == hash(Itv(float('inf'), float('inf')))
+    assert v != Itv(1, 5)
+    assert pickle.loads(pickle.dumps(v)) == v
+    assert copy.deepcopy(v) is v
+    assert Itv(3, 1, '[]') == Itv(2, 2, '(]') == Itv.empty_set()
+
+
+def test_inf_endpoints():
+    # 另一端为数值时无穷端点转为float，其他类型保留inf，仍然可以比较
+    assert type(Itv(-inf, 3).a) is float and type(Itv(3, inf).b) is float
+    assert Itv(-inf, 3) == Itv(-float('inf'), 3) and hash(Itv(3, inf)) == hash(Itv(3, float('inf')))
+    assert type((Itv(-inf, inf) & Itv(1, inf)).b) is float
+    assert 3 in Itv(-inf, inf) and Itv(-inf, inf).intersect(Itv(0, 1))
+
+    from datetime import datetime
+    d1, d2 = datetime(2020, 1, 1), datetime(2020, 1, 3)
+    v = Itv(-inf, d1, '(]')
+    assert d1 in v and d2 not in v and datetime(1900, 1, 1) in v
+    assert v.intersect(Itv(d1, d2)) and not v.intersect(Itv(d1, d2, '(]'))
+    assert v & Itv(d1, d2) == Itv(d1, d1)
+    assert Itv(d2, d1).empty() and Itv(d2, d1) == Itv.empty_set()
+    assert Itv('a', 'c') & Itv(-inf, 'b') == Itv('a', 'b')
+    assert Itv('a', inf) | Itv('b', 'c') == Itv('a', inf)
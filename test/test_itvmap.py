@@ -0,0 +1,128 @@
+import operator
+import pickle
+import random
+
+from icl import *
+
+
+def test_add():
+    # boost::icl的party例子
+    m = ItvMap(aggregate=operator.or_)
+    m.add(Itv(1, 5), {'Mary'})
+    m.add(Itv(3, 7), {'Harry'})
+    assert list(m.items()) == [
+        (Itv(1, 3, '[)'), {'Mary'}),
+        (Itv(3, 5), {'Mary', 'Harry'}),
+        (Itv(5, 7, '(]'), {'Harry'}),
+    ]
+    assert m[4] == {'Mary', 'Harry'}
+    assert m.get(8) is None
+    assert 8 not in m
+
+    m = ItvMap([(Itv(1, 5), 1), (Itv(3, 7), 1)])
+    assert list(m.items()) == [(Itv(1, 3, '[)'), 1), (Itv(3, 5), 2), (Itv(5, 7, '(]'), 1)]
+
+
+def test_join():
+    m = ItvMap([(Itv(1, 3, '[)'), 1), (Itv(3, 5), 1)])
+    assert list(m.items()) == [(Itv(1, 5), 1)]
+
+    m = ItvMap([(Itv(0, 5, '[)'), 2), (Itv(5, 6), 1), (Itv(6, 8, '(]'), 2)])
+    assert len(m) == 3
+    m.add(Itv(5, 6), 1)
+    assert list(m.items()) == [(Itv(0, 8), 2)]
+
+    m.set(Itv(2, 3), 5)
+    assert list(m.items()) == [(Itv(0, 2, '[)'), 2), (Itv(2, 3), 5), (Itv(3, 8, '(]'), 2)]
+    m.set(Itv(2, 3), 2)
+    assert list(m.items()) == [(Itv(0, 8), 2)]
+
+
+def test_remove():
+    m = ItvMap([(Itv(0, 10), 1), (Itv(20, 30), 2)])
+    m.remove(Itv(5, 25))
+    assert list(m.items()) == [(Itv(0, 5, '[)'), 1), (Itv(25, 30, '(]'), 2)]
+    m.remove(Itv(-inf, inf))
+    assert m.empty() and len(m) == 0
+
+
+def test_random():
+    random.seed(2333)
+    points = [i / 2 for i in range(-2, 250)]
+    m = ItvMap()
+    model = {p: 0 for p in points}
+    kinds = ['()', '(]', '[)', '[]']
+    for _ in range(300):
+        a = random.randint(0, 100)
+        itv = Itv(a, a + random.randint(0, 20), random.choice(kinds))
+        op = random.random()
+        v = random.randint(1, 3)
+        for p in points:
+            if p in itv:
+                if op < 0.5:
+                    model[p] += v
+                elif op < 0.8:
+                    model[p] = v
+                else:
+                    model[p] = 0
+        if op < 0.5:
+            m.add(itv, v)
+        elif op < 0.8:
+            m.set(itv, v)
+        else:
+            m.remove(itv)
+
+        for p in points:
+            assert m.get(p, 0) == model[p]
+        items = list(m.items())
+        for (itv1, v1), (itv2, v2) in zip(items, items[1:]):
+            assert not itv1.intersect(itv2)
+            assert v1 != v2 or not itv1.intersect_or_near(itv2)
+
+    window = Itv(30, 60, '(]')
+    assert list(m.overlapping(window)) == [(itv, v) for itv, v in m.items() if itv.intersect(window)]
+    assert m.copy() == m
+
+
+def test_copy():
+    m1 = ItvMap([(Itv(0, 10), 1), (Itv(20, 30), 2)])
+    m2 = m1.copy()
+    m2.add(Itv(5, 25), 1)
+    m1.remove(Itv(0, 5))
+    assert list(m1.items()) == [(Itv(5, 10, '(]'), 1), (Itv(20, 30), 2)]
+    assert list(m2.items()) == [
+        (Itv(0, 5, '[)'), 1), (Itv(5, 10), 2), (Itv(10, 20, '()'), 1),
+        (Itv(20, 25), 3), (Itv(25, 30, '(]'), 2),
+    ]
+
+
+def test_pickle():
+    m = ItvMap(aggregate=operator.or_)
+    random.seed(5)
+    for i in range(200):
+        a = random.randint(0, 1000)
+        m.add(Itv(a, a + random.randint(0, 20)), {i % 7})
+    t = pickle.loads(pickle.dumps(m))
+    assert t == m
+    assert t.aggregate is operator.or_
+    t.add(Itv(0, 2000), {100})
+    assert t != m
+    root = pickle.loads(pickle.dumps(m._root))
+    assert [(n.itv, n.value) for n in root] == list(m.items())
+
+
+def test_datetime():
+    from datetime import datetime
+
+    day = [datetime(2020, 1, i) for i in range(1, 11)]
+    m = ItvMap(aggregate=operator.or_)
+    m.add(Itv(day[0], day[4]), {'Mary'})
+    m.add(Itv(day[2], day[6]), {'Harry'})
+    assert list(m.items()) == [
+        (Itv(day[0], day[2], '[)'), {'Mary'}),
+        (Itv(day[2], day[4]), {'Mary', 'Harry'}),
+        (Itv(day[4], day[6], '(]'), {'Harry'}),
+    ]
+    m.remove(Itv(day[3], day[9]))
+    assert m[day[2]] == {'Mary', 'Harry'} and day[3] not in m
+    assert pickle.loads(pickle.dumps(m)) == m
@@ -0,0 +1,103 @@
+import copy
+import pickle
+import random
+
+import pytest
+
+from icl import *
+from icl.itvmultiset_treap import _key
+from conftest import random_itvs
+
+
+def check(s: ItvMultiSet, itvs: list):
+    """
+    与按_key排序的列表逐项比较，并检查每个节点的upper
+    """
+    expected = sorted((v for v in itvs if not v.empty()), key=_key)
+    assert list(s) == expected
+    assert len(s) == len(expected)
+    stack = [s._root] if s._root is not None else []
+    while stack:
+        n = stack.pop()
+        sub = [m.itv for m in n]
+        assert n.upper.b == max(v.b for v in sub)
+        assert n.upper.right_open == all(v.right_open for v in sub if v.b == n.upper.b)
+        stack.extend(ch for ch in (n.lch, n.rch) if ch is not None)
+
+
+def test_add_remove():
+    s = ItvMultiSet([Itv(1, 5), Itv(3, 7), Itv(1, 5), Itv(2, 1)])
+    assert list(s) == [Itv(1, 5), Itv(1, 5), Itv(3, 7)]
+    assert s.count(Itv(1, 5)) == 2 and s.count(Itv(1, 5, '[)')) == 0
+    assert str(s) == 'ItvMultiSet{[1, 5], [1, 5], [3, 7]}'
+
+    s.remove(Itv(1, 5))
+    assert list(s) == [Itv(1, 5), Itv(3, 7)]
+    assert not s.discard(Itv(1, 5, '(]'))
+    with pytest.raises(KeyError):
+        s.remove(Itv(3, 6))
+    s.add(Itv(1, 5, '(]'))
+    s.add(Itv(1, 4))
+    assert list(s) == [Itv(1, 4), Itv(1, 5), Itv(1, 5, '(]'), Itv(3, 7)]
+    assert s.max_upper() == Itv(3, 7)
+    assert ItvMultiSet().max_upper() is None
+
+    rnd = random.Random(1)
+    itvs = random_itvs(100, 2)
+    s = ItvMultiSet(itvs, seed=3)
+    check(s, itvs)
+    for v in random_itvs(300, 4):
+        if rnd.random() < 0.5:
+            s.add(v)
+            itvs.append(v)
+        else:
+            assert s.discard(v) == (v in itvs and not v.empty())
+            if v in itvs:
+                itvs.remove(v)
+        check(s, itvs)
+    for v in set(itvs):
+        assert s.count(v) == (0 if v.empty() else itvs.count(v))
+
+
+def test_stab_overlapping():
+    itvs = random_itvs(500, 1, hi=300) + [Itv(-inf, 10, '()'), Itv(200, inf), Itv(150, 150)]
+    s = ItvMultiSet(itvs)
+    ordered = list(s)
+    for i in range(-2, 640):
+        x = i / 2
+        assert list(s.stab(x)) == [v for v in ordered if x in v]
+        assert (x in s) == any(x in v for v in ordered)
+    for w in random_itvs(300, 2, hi=300) + [Itv(-inf, inf), Itv.empty_set()]:
+        assert list(s.overlapping(w)) == [v for v in ordered if v.intersect(w)]
+    assert s.coalesce() == ItvSet(itvs)
+
+
+def test_copy_pickle():
+    s1 = ItvMultiSet(random_itvs(100, 1))
+    s2 = copy.copy(s1)
+    itvs = list(s1)
+    for v in random_itvs(100, 2):
+        s2.add(v)
+        s2.discard(itvs[0])
+    check(s1, itvs)
+    assert s1 != s2
+
+    s3 = pickle.loads(pickle.dumps(s2))
+    check(s3, list(s2))
+    assert s3 == s2
+    assert list(s3.stab(50)) == list(s2.stab(50))
+    assert pickle.loads(pickle.dumps(ItvMultiSet())).empty()
+
+
+def test_seed():
+    def shape(n):
+        return None if n is None else (n.itv, shape(n.lch), shape(n.rch))
+
+    s1, s2 = ItvMultiSet(random_itvs(100, 1), seed=5), ItvMultiSet(random_itvs(100, 1), seed=5)
+    c1, _ = s1.copy(), s2.copy()
+    for v in random_itvs(50, 2):
+        c1.add(v)
+    for v in random_itvs(50, 3):
+        s1.add(v)
+        s2.add(v)
+    assert shape(s1._root) == shape(s2._root)
@@ -1,11 +1,25 @@
+import copy
 import functools
+import pickle
 
 import more_itertools
+import pytest
 
 from icl import *
+from conftest import random_itvs, same_itv
 import random
 
 
+@pytest.fixture(autouse=True, params=['treap', 'avl'])
+def backend(request):
+    """
+    每个测试在所有后端上各运行一次
+    """
+    set_default_backend(request.param)
+    yield request.param
+    set_default_backend('treap')
+
+
 def make_itvs(pairs):
     return [Itv(pair[0], pair[1]) for pair in pairs]
 
@@ -144,4 +158,635 @@ def test_in():
     assert 1 in s
     assert 27 not in s
     assert 705 not in s
-    assert 533 in s
\ No newline at end of file
+    assert 533 in s
+
+def test_from_iterable():
+    random.seed(2333)
+    idxs = sorted({random.randint(1, 10000) for _ in range(1000)})
+    itvs = Itv(0, 10000).splits(idxs)
+    s = ItvSet.from_sorted(itvs)
+    assert list(s) == [Itv(0, 10000)]
+
+    itvs = Itv(0, 10000).splits(idxs, True)[::2]
+    expected = ItvSet()
+    for v in itvs:
+        expected.add(v)
+    assert ItvSet.from_sorted(itvs) == expected
+    random.shuffle(itvs)
+    assert ItvSet.from_iterable(itvs) == expected
+    assert ItvSet(itvs) == expected
+
+
+def test_ior_bulk():
+    random.seed(2333)
+    idxs = sorted({random.randint(1, 10000) for _ in range(1000)})
+    itvs = Itv(0, 10000).splits(idxs)
+    s1 = ItvSet(itvs[::2])
+    s2 = ItvSet(itvs[1::2])
+    s1 |= s2
+    assert list(s1) == [Itv(0, 10000)]
+
+
+def test_binary_ops():
+    points = [i / 2 for i in range(-2, 2 * 115)]
+    for seed in range(20):
+        s1 = ItvSet(random_itvs(20, seed))
+        s2 = ItvSet(random_itvs(20, seed + 100))
+        ops = {
+            '&': (s1 & s2, lambda x, y: x and y),
+            '|': (s1 | s2, lambda x, y: x or y),
+            '-': (s1 - s2, lambda x, y: x and not y),
+            '^': (s1 ^ s2, lambda x, y: x != y),
+        }
+        for op, (res, pred) in ops.items():
+            for p in points:
+                assert (p in res) == pred(p in s1, p in s2), (op, p)
+            itvs = list(res)
+            for v1, v2 in zip(itvs, itvs[1:]):
+                assert not v1.intersect_or_near(v2)
+
+        s3 = s1.copy()
+        s3 ^= s2
+        assert s3 == s1 ^ s2
+        s3 = s1.copy()
+        s3 &= s2
+        assert s3 == s1 & s2
+
+
+def test_inplace_ops_bulk():
+    s1 = ItvSet(random_itvs(300, 1, hi=3000))
+    s2 = ItvSet(random_itvs(300, 2, hi=3000))
+    expected = ItvSet(s1)
+    for v in s2:
+        expected.remove(v)
+    s3 = s1.copy()
+    s3 -= s2
+    assert s3 == expected == s1 - s2
+
+    expected = s1.copy()
+    for v in s2:
+        expected.add(v)
+    s3 = s1.copy()
+    s3 |= s2
+    assert s3 == expected == s1 | s2
+
+
+def check_size(n):
+    if n is None:
+        return 0
+    size = check_size(n.lch) + check_size(n.rch) + 1
+    assert n.size == size
+    return size
+
+
+def test_len_rank_kth():
+    s = ItvSet()
+    assert len(s) == 0
+    assert s.rank(0) == 0
+    assert s[:] == ItvSet()
+
+    s = ItvSet(random_itvs(300, 1, hi=3000))
+    for v in random_itvs(100, 2, hi=3000):
+        s.add(v)
+        check_size(s._root)
+    for v in random_itvs(100, 3, hi=3000):
+        s.remove(v)
+        check_size(s._root)
+    itvs = list(s)
+    assert len(s) == len(itvs)
+    for i, v in enumerate(itvs):
+        assert s.kth(i) == v == s[i]
+        assert s.rank((v.a + v.b) / 2) == i
+        assert s.rank(v.b) == i + v.right_open
+    assert s[-1] == itvs[-1]
+    assert list(s[10:20]) == itvs[10:20]
+    assert list(s[::3]) == itvs[::3]
+    assert list(s[-5:]) == itvs[-5:]
+
+
+def test_degenerate_tree(backend):
+    from icl.itvset_treap import Node
+
+    if backend != 'treap':
+        pytest.skip('只有treap会退化')
+
+    # 优先级单调，构造出一条链
+    n = 5000
+    root = None
+    for i in reversed(range(n)):
+        node = Node(Itv(2 * i, 2 * i + 1))
+        node.priority = n - i
+        node.set_rch(root)
+        root = node
+    s = ItvSet._create(root)
+    assert s._root.height() == n
+
+    itvs = [Itv(2 * i, 2 * i + 1) for i in range(n)]
+    assert list(s) == itvs
+    assert list(s._root.cba_order_iter())[::-1] == list(s._root)
+    assert 2 * n - 1 in s
+    assert 2 * n - 0.5 not in s
+    assert list(s.copy()) == itvs
+    assert pickle.loads(pickle.dumps(s)) == s
+    assert [n.itv for n in pickle.loads(pickle.dumps(s._root))] == itvs
+
+    s.add(Itv(2 * n - 2, 2 * n))
+    s.remove(Itv(0, 0.5))
+    assert s[0] == Itv(0.5, 1, '(]')
+    assert s[-1] == Itv(2 * n - 2, 2 * n)
+    assert len(s) == n
+
+
+def test_contains_many():
+    import numpy as np
+
+    s = ItvSet()
+    assert not s.contains_many([1, 2]).any()
+    assert (s.locate_many([1, 2]) == -1).all()
+
+    s = ItvSet(random_itvs(50, 1) + [Itv(-inf, -10, '()'), Itv(200, inf, '(]')])
+    points = np.arange(-30, 240) / 2
+    expected = [p in s for p in points]
+    assert s.contains_many(points).tolist() == expected
+    idxs = s.locate_many(points)
+    for p, i in zip(points, idxs):
+        assert i == -1 or p in s[i]
+
+    # 修改后缓存失效
+    s.add(Itv(-5, -3, '[)'))
+    assert s.contains_many([-5, -3]).tolist() == [True, False]
+    s.remove(Itv(-5, -4))
+    assert s.contains_many([-5, -3.5]).tolist() == [False, True]
+
+    # 超过2**53的int端点与无穷端点或float端点同时出现时不能被舍入
+    t0 = 2 ** 60
+    s = ItvSet([Itv(-inf, -t0, '()'), Itv(t0 + 1, t0 + 3), Itv(t0 + 100, inf, '[)')])
+    points = [-inf, -t0 - 1, -t0, t0, t0 + 1, t0 + 4, t0 + 99, t0 + 100, 2 ** 63, 2 ** 70, inf]
+    assert s.contains_many(points).tolist() == [p in s for p in points]
+    assert s.locate_many(np.array(points[1:-3])).tolist() == [0, -1, -1, 1, -1, -1, 2]
+    assert s._array()[0] == s[0] and list(s._array()) == list(s)
+    s = ItvSet([Itv(0, 0.5), Itv(t0 + 1, t0 + 3)])
+    assert s.contains_many([t0, t0 + 1, t0 + 4]).tolist() == [False, True, False]
+
+
+def test_add_touching_both_sides():
+    s = ItvSet([Itv(0, 5, '[)'), Itv(5, 7, '(]')])
+    s.add(Itv(5, 5))
+    assert list(s) == [Itv(0, 7)]
+
+
+def test_copy_on_write():
+    base = ItvSet(random_itvs(500, 1, hi=5000))
+    expected = list(base)
+    points = [i / 2 for i in range(0, 10050, 7)]
+
+    versions = []
+    for seed in range(20):
+        s = base.copy()
+        assert s._root is base._root
+        ops = random_itvs(10, seed + 10, hi=5000)
+        for i, v in enumerate(ops):
+            if i % 2:
+                s.add(v)
+            else:
+                s.remove(v)
+        s.intersection(Itv(100, 4900))
+        versions.append((s, ops))
+
+    assert list(base) == expected
+    for s, ops in versions:
+        check_size(s._root)
+        model = ItvSet(expected)
+        for i, v in enumerate(ops):
+            if i % 2:
+                model.add(v)
+            else:
+                model.remove(v)
+        model.intersection(Itv(100, 4900))
+        assert s == model
+        assert [p in s for p in points] == [p in model for p in points]
+
+    # 修改副本只会复制O(log n)个节点
+    s = base.copy()
+    s.add(Itv(2500.5, 2500.7))
+    shared = {id(n) for n in base._root}
+    new_nodes = [n for n in s._root if id(n) not in shared]
+    assert len(new_nodes) <= 4 * base._root.height()
+
+
+def test_overlapping():
+    s = ItvSet(random_itvs(100, 1, hi=1000))
+    assert list(ItvSet().overlapping(Itv(0, 1))) == []
+    for w in random_itvs(50, 2, hi=1000) + [Itv(-inf, inf), Itv(3, 3), Itv.empty_set()]:
+        expected = [v for v in s if v.intersect(w)]
+        assert list(s.overlapping(w)) == expected
+        assert list(s.clip(w)) == [v & w for v in expected]
+        assert ItvSet.from_sorted(s.clip(w)) == s & ItvSet([w])
+
+    assert list(s.irange()) == list(s)
+    v = s[10]
+    assert list(s.irange(v.b, None))[0] == (v if not v.right_open else s[11])
+    assert list(s.irange(v.b, None, (False, True)))[0] == s[11]
+    assert list(s.irange(None, v.a, (True, False)))[-1] == s[9]
+
+
+def check_avl(n):
+    if n is None:
+        return 0
+    hl, hr = check_avl(n.lch), check_avl(n.rch)
+    assert abs(hl - hr) <= 1
+    assert n.tree_height == max(hl, hr) + 1
+    return n.tree_height
+
+
+def test_backend_select(backend):
+    s = ItvSet([Itv(0, 1)])
+    assert type(s) is {'treap': ItvSet, 'avl': AvlItvSet}[backend]
+    assert type(ItvSet.from_sorted([Itv(0, 1)])) is type(s)
+    assert type(s | ItvSet([Itv(2, 3)], backend='treap')) is type(s)
+    assert type(s.copy()) is type(s)
+    assert type(ItvSet(backend='avl')) is AvlItvSet
+    with pytest.raises(ValueError):
+        ItvSet(backend='btree')
+    with pytest.raises(ValueError):
+        set_default_backend('btree')
+
+
+def test_avl_balance():
+    s = AvlItvSet()
+    # 有序插入会让不平衡的树退化成链
+    for i in range(2000):
+        s.add(Itv(2 * i, 2 * i + 1))
+        if i % 97 == 0:
+            check_avl(s._root)
+    check_avl(s._root)
+    assert s._root.height() <= 1.45 * (2000).bit_length()
+
+    rnd = random.Random(8)
+    for v in random_itvs(500, 7, hi=4000):
+        if rnd.random() < 0.5:
+            s.add(v)
+        else:
+            s.remove(v)
+    check_avl(s._root)
+    check_size(s._root)
+
+
+def check_measure(n):
+    from icl.itvset_treap import _measure
+
+    if n is None:
+        return 0
+    res = check_measure(n.lch) + check_measure(n.rch) + n.itv.length()
+    assert _measure(n) == n.measure == res
+    return res
+
+
+def test_measure():
+    assert ItvSet().measure() == 0
+    assert ItvSet().measure(Itv(0, 1)) == 0
+
+    s = ItvSet(random_itvs(300, 1, hi=3000))
+    for v in random_itvs(100, 2, hi=3000):
+        s.add(v)
+    for v in random_itvs(100, 3, hi=3000):
+        s.remove(v)
+    check_measure(s._root)
+    assert s.measure() == sum(v.length() for v in s)
+
+    windows = random_itvs(100, 4, hi=3000) + [Itv(-inf, inf), Itv(5, 5), Itv.empty_set(), s[3], s[-1]]
+    windows += [Itv(s[i].a, s[i + 1].b, '()') for i in range(0, 20)]
+    for w in windows:
+        assert s.measure(w) == sum((v & w).length() for v in s if v.intersect(w))
+
+    t = s.copy()
+    t.remove(Itv(0, 1000))
+    assert s.measure() == sum(v.length() for v in s)
+    assert t.measure() == s.measure(Itv(1000, inf, '(]'))
+
+
+def test_measure_inf():
+    s = ItvSet([Itv(-inf, 0, '(]'), Itv(1, 3), Itv(10, inf, '[)')])
+    assert s.measure() == inf
+    assert s.measure(Itv(-5, 2)) == 6
+    assert s.measure(Itv(0.5, 12)) == 4
+    assert s.measure(Itv(2, 10, '()')) == 1
+    assert s.measure(Itv(-inf, 0.5)) == inf
+    assert Itv(-inf, 5).length() == inf
+    assert Itv(3, 3).length() == Itv.empty_set().length() == 0
+
+
+@pytest.mark.parametrize('backend', ['treap', 'avl'])
+def test_non_numeric_endpoints(backend):
+    from datetime import datetime, timedelta
+
+    # 建树不依赖端点的减法，measure只在调用时计算
+    day = [datetime(2020, 1, i) for i in range(1, 11)]
+    s = ItvSet([Itv(day[0], day[2]), Itv(day[5], day[6], '[)'), Itv(day[1], day[3])], backend=backend)
+    assert list(s) == [Itv(day[0], day[3]), Itv(day[5], day[6], '[)')]
+    assert day[2] in s and day[6] not in s
+    s.add(Itv(day[8], day[8]))
+    s.remove(Itv(day[1], day[2], '()'))
+    assert s == ItvSet([Itv(day[0], day[1]), Itv(day[2], day[3]), Itv(day[5], day[6], '[)'), Itv(day[8], day[8])])
+    assert s.measure() == timedelta(days=3)
+    assert s.measure(Itv(day[1], day[5])) == timedelta(days=1)
+    assert s.measure(Itv(day[0], day[9])) == timedelta(days=3)
+    assert ItvSet([Itv(day[4], day[4])], backend=backend).measure() == timedelta(0)
+    assert list(s.iter_gaps(Itv(day[3], day[5]))) == [Itv(day[3], day[5], '()')]
+    assert list(-s)[0] == Itv(-inf, day[0], '[)')
+    assert s.nearest(day[7] + timedelta(hours=1)) == Itv(day[8], day[8])
+
+    t = ItvSet([Itv('a', 'c'), Itv('b', 'd'), Itv('x', 'z', '()')], backend=backend)
+    assert list(t) == [Itv('a', 'd'), Itv('x', 'z', '()')]
+    assert 'y' in t and 'x' not in t
+    assert t == ItvSet([Itv('x', 'z', '()'), Itv('a', 'd')])
+    with pytest.raises(TypeError):
+        t.measure()
+
+
+def test_add_remove_many():
+    points = [i / 2 for i in range(-10, 2 * 3100)]
+    for n, m in [(0, 50), (300, 10), (300, 100), (30, 300), (1000, 3)]:
+        base = ItvSet(random_itvs(n, n, hi=3000))
+        batch = random_itvs(m, m, hi=3000)
+
+        expected = base.copy()
+        for v in batch:
+            expected.add(v)
+        s = base.copy()
+        s.add_many(batch)
+        assert s == expected
+        check_size(s._root)
+        check_measure(s._root)
+        assert [p in s for p in points] == [p in expected for p in points]
+
+        expected = base.copy()
+        for v in batch:
+            expected.remove(v)
+        s = base.copy()
+        s.remove_many(batch)
+        assert s == expected
+        check_size(s._root)
+        check_measure(s._root)
+        assert [p in s for p in points] == [p in expected for p in points]
+
+    # 批量中的区间被树中的区间连接起来
+    s = ItvSet([Itv(0, 10), Itv(20, 30, '(]')])
+    s.add_many([Itv(1, 2), Itv(5, 6), Itv(10, 20, '(]'), Itv(25, 26), Itv(31, 32)])
+    assert list(s) == [Itv(0, 30), Itv(31, 32)]
+    s.remove_many([Itv(-1, 0), Itv(1, 2, '()'), Itv(3, 4, '[)'), Itv(29, 31, '()')])
+    assert list(s) == [Itv(0, 1, '(]'), Itv(2, 3, '[)'), Itv(4, 29), Itv(31, 32)]
+
+
+@pytest.mark.parametrize('backend', ['treap', 'avl'])
+def test_remove_many_points(backend):
+    # 点区间[x, x]与树中的(x, y]不相交，(x, y]仍需与批量中右侧的区间比较
+    batch = [Itv(1, 1), Itv(17, 17), Itv(20, 20)]
+    s = ItvSet([Itv(17, 20, '(]')], backend=backend)
+    s.remove_many(batch)
+    assert list(s) == [Itv(17, 20, '()')]
+    s = ItvSet([Itv(17, 20, '(]')], backend=backend)
+    s -= ItvSet(batch)
+    assert list(s) == [Itv(17, 20, '()')]
+
+    rnd = random.Random(7)
+    kinds = ['()', '(]', '[)', '[]']
+    for _ in range(200):
+        base = [Itv(a, a + rnd.randint(0, 5), rnd.choice(kinds)) for a in rnd.sample(range(40), 8)]
+        points = [Itv(x, x) for x in rnd.sample(range(45), rnd.randint(1, 10))]
+        expected = ItvSet(base, backend=backend)
+        for v in points:
+            expected.remove(v)
+        s = ItvSet(base, backend=backend)
+        s.remove_many(points)
+        assert s == expected
+        assert ItvSet(base, backend=backend) - ItvSet(points) == expected
+
+
+def test_union_intersection_many():
+    sets = [ItvSet(random_itvs(30, seed, hi=1000)) for seed in range(50)]
+    before = [list(s) for s in sets]
+
+    res = ItvSet.union(*sets)
+    assert res == functools.reduce(lambda x, y: x | y, sets)
+    assert [list(s) for s in sets] == before
+    assert res is not sets[0]
+    assert ItvSet.union() == ItvSet()
+    assert ItvSet.union(sets[0], [Itv(2000, 2001)]) == sets[0] | ItvSet([Itv(2000, 2001)])
+
+    for k in (1, 2, 3, 5):
+        res = ItvSet.intersection(*sets[:k])
+        assert res == functools.reduce(lambda x, y: x & y, sets[:k])
+        check_size(res._root)
+    dense = [ItvSet(random_itvs(300, seed, hi=1000)) for seed in range(5)]
+    assert ItvSet.intersection(*dense) == functools.reduce(lambda x, y: x & y, dense)
+    assert ItvSet.intersection(*sets) == ItvSet()
+    assert ItvSet.intersection() == ItvSet()
+    assert [list(s) for s in sets] == before
+
+    # 通过实例调用时原地修改
+    s = sets[0].copy()
+    assert s.union(*sets[1:]) is s
+    assert s == ItvSet.union(*sets)
+    s = sets[0].copy()
+    assert s.intersection(Itv(100, 200)) is s
+    assert s == sets[0] & ItvSet([Itv(100, 200)])
+    s = sets[0].copy()
+    assert s.intersection(sets[1]) is s
+    assert s == sets[0] & sets[1]
+    dense = [ItvSet(random_itvs(300, seed, hi=1000)) for seed in range(3)]
+    s = dense[0].copy()
+    assert s.intersection(dense[1], list(dense[2]), Itv(100, 900)) is s
+    assert s == dense[0] & dense[1] & dense[2] & ItvSet([Itv(100, 900)])
+    assert dense[0].copy().intersection() == dense[0]
+
+
+def test_pickle():
+    s = ItvSet(random_itvs(300, 1, hi=3000) + [Itv(-inf, -5, '()'), Itv(4000, inf, '(]')])
+    data = pickle.dumps(s)
+    t = pickle.loads(data)
+    assert type(t) is type(s)
+    assert t == s
+    check_size(t._root)
+    check_measure(t._root)
+    t.add(Itv(-1, -0.5))
+    assert t != s
+    assert len(data) < len(pickle.dumps(list(s)))
+
+    root = pickle.loads(pickle.dumps(s._root))
+    assert type(root) is type(s._root)
+    assert [n.itv for n in root] == list(s)
+    check_size(root)
+
+    for t in (copy.copy(s), copy.deepcopy(s)):
+        assert t == s
+        t.remove(Itv(0, 100))
+        assert t != s
+    assert pickle.loads(pickle.dumps(ItvSet())) == ItvSet()
+
+
+def test_iter_gaps():
+    s = ItvSet(random_itvs(100, 1, hi=1000))
+    full = ItvSet([Itv(-inf, inf)]) - s
+    assert list(s.iter_gaps()) == list(full)
+    for w in random_itvs(50, 2, hi=1000) + [Itv(-inf, inf), Itv(-5, -1), Itv(3, 3), Itv.empty_set(), s[5]]:
+        assert list(s.iter_gaps(w)) == list(full & ItvSet([w]))
+    assert list(ItvSet().iter_gaps(Itv(0, 1, '()'))) == [Itv(0, 1, '()')]
+    assert list(ItvSet([Itv(-inf, inf)]).iter_gaps()) == []
+
+
+def test_complement_view():
+    s = ItvSet(random_itvs(100, 1, hi=1000) + [Itv(-inf, -3, '()')])
+    full = ItvSet([Itv(-inf, inf)]) - s
+    c = -s
+    assert isinstance(c, ItvSetComplement)
+    assert c == full
+    assert len(c) == len(full)
+    assert [p / 2 in c for p in range(-20, 2100)] == [p / 2 in full for p in range(-20, 2100)]
+    for w in random_itvs(30, 2, hi=1000) + [Itv(-inf, inf), Itv(-5, -1)]:
+        assert list(c.overlapping(w)) == list(full.overlapping(w))
+        assert list(c.clip(w)) == list(full.clip(w))
+        assert list(c.iter_gaps(w)) == list(s.clip(w))
+
+    t = ItvSet(random_itvs(100, 3, hi=1000))
+    assert c & t == full & t
+    assert c | t == full | t
+    assert c - t == full - t
+    assert c ^ t == full ^ t
+    assert c & -t == full & (-t).materialize()
+    assert c | -t == full | (-t).materialize()
+    assert c - -t == full & t
+    assert c ^ -t == s ^ t
+    assert -c == s
+    assert c.materialize() == full
+    assert c & [Itv(0, 10)] == full & ItvSet([Itv(0, 10)])
+
+    # 补集在右侧时同样改写为原集合上的运算，不展开视图
+    assert t & c == full & t
+    assert isinstance(t | c, ItvSetComplement) and t | c == full | t
+    assert t - c == t & s
+    assert isinstance(t ^ c, ItvSetComplement) and t ^ c == full ^ t
+    assert [Itv(0, 10)] - c == s & ItvSet([Itv(0, 10)])
+    u = t.copy()
+    u &= c
+    assert u == full & t
+    u = t.copy()
+    u |= c
+    assert u == full | t
+
+    # 视图随原集合变化
+    s.add(Itv(-inf, inf))
+    assert c.empty()
+    assert list(c) == []
+    assert len(c) == 0
+    assert len(-ItvSet()) == 1
+
+
+def _brute_floor_ceil(itvs, x):
+    left = [v for v in itvs if v < x or x in v]
+    right = [v for v in itvs if v > x or x in v]
+    return (left[-1] if left else None), (right[0] if right else None)
+
+
+def test_nearest():
+    s = ItvSet(random_itvs(60, 1, hi=500))
+    itvs = list(s)
+    for x in [i / 4 for i in range(-8, 2100)]:
+        lo, hi = _brute_floor_ceil(itvs, x)
+        assert same_itv(s.floor(x), lo)
+        assert same_itv(s.ceil(x), hi)
+        dists = [(abs(x - v.b) if v < x else abs(v.a - x) if v > x else 0, i) for i, v in enumerate(itvs)]
+        d, i = min(dists)
+        assert s.distance(x) == d
+        assert s.nearest(x) == itvs[i]
+        assert s._root.find_nearest(x).itv == itvs[i]
+        assert same_itv(getattr(s._root.find_by_lower(x), 'itv', None), hi)
+        assert same_itv(getattr(s._root.find_by_upper(x), 'itv', None), lo)
+
+    for i, v in enumerate(itvs):
+        assert same_itv(s.successor(v), itvs[i + 1] if i + 1 < len(itvs) else None)
+        assert same_itv(s.predecessor(v), itvs[i - 1] if i > 0 else None)
+    for w in random_itvs(100, 2, hi=500):
+        if w.empty():
+            assert s.successor(w) is None and s.predecessor(w) is None
+            continue
+        assert same_itv(s.successor(w), next((v for v in itvs if w.b <= v.a and not w.intersect(v)), None))
+        assert same_itv(s.predecessor(w), next((v for v in reversed(itvs) if v.b <= w.a and not w.intersect(v)), None))
+
+    e = ItvSet()
+    assert e.floor(1) is None and e.ceil(1) is None and e.nearest(1) is None
+    assert e.distance(1) == inf
+    assert e.successor(Itv(0, 1)) is None and e.predecessor(Itv(0, 1)) is None
+
+    s = ItvSet([Itv(0, 1, '[)'), Itv(3, 5, '(]')])
+    assert s.nearest(2) == Itv(0, 1, '[)')   # 距离相同时取左边
+    assert s.distance(1) == 0 and s.distance(3) == 0
+    assert s.floor(1) == Itv(0, 1, '[)') and s.ceil(1) == Itv(3, 5, '(]')
+    assert s.successor(Itv(1, 3)) == Itv(3, 5, '(]')
+    assert s.successor(Itv(1, 4)) is None
+    assert s.predecessor(Itv(1, 3)) == Itv(0, 1, '[)')
+
+
+def test_seed():
+    def shape(n):
+        return None if n is None else (n.itv, shape(n.lch), shape(n.rch))
+
+    itvs = random_itvs(300, 1, hi=3000)
+    random.seed(5)
+    state = random.getstate()
+    s1 = ItvSet(itvs, seed=42)
+    s2 = ItvSet(itvs, seed=42)
+    assert random.getstate() == state   # 不消耗全局随机数
+    for v in random_itvs(100, 2, hi=3000):
+        s1.add(v)
+        s2.add(v)
+    assert shape(s1._root) == shape(s2._root)
+    c1, c2 = s1.copy(), s2.copy()
+    c1.remove(Itv(100, 200))
+    c2.remove(Itv(100, 200))
+    assert shape(c1._root) == shape(c2._root)
+    assert s1 == s2
+    assert not hasattr(s1._root, '__dict__')
+
+    # 修改副本不影响原集合之后的形状
+    s1, s2 = ItvSet(itvs, seed=42), ItvSet(itvs, seed=42)
+    c1, c2 = s1.copy(), s2.copy()
+    for v in random_itvs(50, 3, hi=3000):
+        c1.add(v)
+    for v in random_itvs(100, 2, hi=3000):
+        s1.add(v)
+        s2.add(v)
+    assert shape(s1._root) == shape(s2._root)
+    for v in random_itvs(50, 3, hi=3000):
+        c2.add(v)
+    assert shape(c1._root) == shape(c2._root)
+
+
+def test_fingerprint():
+    itvs = random_itvs(200, 1, hi=2000) + [Itv(-inf, -3, '()'), Itv(5000, inf)]
+    s1 = ItvSet(itvs)
+    s2 = ItvSet(itvs[::-1], seed=7)
+    assert s1.fingerprint() == s2.fingerprint()
+    assert s1 == s2
+    assert ItvSet().fingerprint() == 0
+    assert ItvSet([Itv(-float('inf'), 0), Itv(1, float('inf'))]) == ItvSet([Itv(-inf, 0), Itv(1, inf)])
+
+    # 修改后与重新构建的集合指纹相同
+    ops = random_itvs(100, 2, hi=2000)
+    for i, v in enumerate(ops):
+        if i % 2:
+            s1.add(v)
+        else:
+            s1.remove(v)
+        c = s1.copy()
+        assert s1.fingerprint() == ItvSet.from_sorted(list(s1)).fingerprint()
+        c.add(Itv(-2, -1))
+        assert c != s1
+        assert 0 <= c.fingerprint() < 2 ** 64
+    s1.add_many(random_itvs(100, 3, hi=2000))
+    s1.remove_many(random_itvs(100, 4, hi=2000))
+    assert s1.fingerprint() == ItvSet(list(s1)).fingerprint()
+    assert s1 == ItvSet(list(s1))
+    assert s1 != s2
+    assert s1 == list(s1)
+    assert s1 != list(s1)[1:]
@@ -0,0 +1,109 @@
+import copy
+import pickle
+import random
+import threading
+
+import pytest
+
+from icl import *
+from conftest import random_itvs
+
+
+@pytest.mark.parametrize('backend', ['treap', 'avl'])
+def test_same_as_itvset(backend):
+    c = ConcurrentItvSet(random_itvs(50, 1, hi=500), backend=backend)
+    s = ItvSet(random_itvs(50, 1, hi=500), backend=backend)
+    for i, v in enumerate(random_itvs(200, 2, hi=500)):
+        if i % 3:
+            c.add(v)
+            s.add(v)
+        else:
+            c.remove(v)
+            s.remove(v)
+    assert c == s
+    assert len(c) == len(s)
+    assert str(c) == 'Concurrent' + str(s)
+
+    other = ItvSet(random_itvs(50, 3, hi=500))
+    for op in ['__iand__', '__ior__', '__isub__', '__ixor__']:
+        c1 = copy.copy(c)
+        s1 = s.copy()
+        assert getattr(c1, op)(other) is c1
+        assert c1 == getattr(s1, op)(other)
+        assert c == s
+    assert c & other == s & other
+    assert other | c == other | s
+
+    points = [i / 2 for i in range(-2, 1050)]
+    assert [p in c for p in points] == [p in s for p in points]
+    assert c.kth(-1) == s.kth(-1) and c.rank(200) == s.rank(200)
+    assert list(c.overlapping(Itv(100, 200))) == list(s.overlapping(Itv(100, 200)))
+    assert c.measure() == s.measure()
+    assert c.nearest(333.3) == s.nearest(333.3)
+    assert -c == -s
+    assert pickle.loads(pickle.dumps(c)) == s
+    with pytest.raises(AttributeError):
+        c._root
+
+
+def test_snapshot_isolation():
+    c = ConcurrentItvSet([Itv(0, 1), Itv(2, 3)])
+    it = iter(c)
+    snap = c.snapshot()
+    c.add(Itv(1, 2))
+    c.remove(Itv(0, 0.5))
+    assert list(it) == [Itv(0, 1), Itv(2, 3)]
+    assert snap == ItvSet([Itv(0, 1), Itv(2, 3)])
+    assert c == ItvSet([Itv(0.5, 3, '(]')])
+
+    # 异常时不发布
+    with pytest.raises(RuntimeError):
+        with c.writing() as s:
+            s.add(Itv(10, 20))
+            raise RuntimeError
+    assert c == ItvSet([Itv(0.5, 3, '(]')])
+
+    snap.add(Itv(100, 200))
+    assert 100 not in c
+
+
+def test_concurrent_readers():
+    """
+    写线程每次把一个长度为1的区间挪到别处，所有读线程看到的总长度都不变
+    """
+    n = 200
+    c = ConcurrentItvSet(Itv(4 * i, 4 * i + 1) for i in range(n))
+    stop = threading.Event()
+    errors = []
+
+    def writer():
+        rnd = random.Random(1)
+        free = list(range(n, 2 * n))
+        used = list(range(n))
+        for _ in range(2000):
+            i = rnd.randrange(n)
+            j = rnd.randrange(n)
+            with c.writing() as s:
+                s.remove(Itv(4 * used[i], 4 * used[i] + 1))
+                s.add(Itv(4 * free[j], 4 * free[j] + 1))
+            used[i], free[j] = free[j], used[i]
+        stop.set()
+
+    def reader():
+        while not stop.is_set():
+            itvs = list(c)
+            if len(itvs) != n or sum(v.length() for v in itvs) != n:
+                errors.append(itvs)
+            if any(u.b >= v.a for u, v in zip(itvs, itvs[1:])):
+                errors.append(itvs)
+            if c.measure() != n:
+                errors.append(c.measure())
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert len(c) == n
+
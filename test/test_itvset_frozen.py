@@ -0,0 +1,208 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from icl import *
+from icl.itvarray import ItvArray, _HEADER_V1
+from conftest import random_itvs, same_itv
+
+
+def test_read_api():
+    itvs = random_itvs(100, 1, hi=1000) + [Itv(-inf, -10, '()')]
+    s = ItvSet(itvs)
+    f = s.freeze()
+    assert isinstance(f, FrozenItvSet)
+    assert f == FrozenItvSet(itvs) == s
+    assert len(f) == len(s)
+    assert list(f) == list(s)
+
+    for p in np.arange(-30, 2030) / 2:
+        assert (p in f) == (p in s)
+        assert f.rank(p) == s.rank(p)
+    assert -inf not in f
+    assert f.contains_many([-20, 3000]).tolist() == [True, False]
+    assert f.locate_many([-20, 3000]).tolist() == [0, -1]
+
+    for i in range(-len(s), len(s)):
+        assert f[i] == f.kth(i) == s[i]
+    for sl in [slice(3, 17), slice(None, None, 4), slice(None, None, -3), slice(5, 2), slice(-4, None)]:
+        assert f[sl] == s[sl]
+
+
+def test_large_int_endpoints():
+    t0 = 1_700_000_000_000_000_001
+    s = ItvSet([Itv(t0, t0 + 10), Itv(t0 + 100, inf)])
+    f = s.freeze()
+    assert list(f) == list(s) and f == s == FrozenItvSet(s)
+    assert f.fingerprint() == FrozenItvSet(s).fingerprint()
+    points = [t0 - 1, t0, t0 + 5, t0 + 50, t0 + 100, 2 ** 63, 2 ** 70, inf]
+    assert [x in f for x in points] == [x in s for x in points]
+    assert f.contains_many(points).tolist() == [x in s for x in points]
+    assert [f.rank(x) for x in points] == [s.rank(x) for x in points]
+    assert f.successor(Itv(t0, t0 + 11)) == Itv(t0 + 100, inf)
+    assert f[1:] == s[1:] and f[:1] == s[:1]
+    assert pickle.loads(pickle.dumps(f)) == f
+
+    arr = f._array()
+    with pytest.raises(ValueError):
+        FrozenItvSet._create(ItvArray(arr.a.astype(float), arr.b.astype(float), arr.flags, True, True))
+    with pytest.raises(TypeError):
+        FrozenItvSet._create(ItvArray(np.array(['a']), np.array(['b']), np.array([0], dtype=np.uint8)))
+
+
+def test_empty():
+    f = FrozenItvSet()
+    assert f.empty() and len(f) == 0
+    assert 1 not in f
+    assert f.rank(1) == 0
+    assert f.thaw() == ItvSet()
+    assert -f == FrozenItvSet([Itv(-inf, inf)])
+
+
+def test_set_ops():
+    s1 = ItvSet(random_itvs(30, 2))
+    s2 = ItvSet(random_itvs(30, 3))
+    f1, f2 = s1.freeze(), s2.freeze()
+    for op in ['__and__', '__or__', '__sub__', '__xor__']:
+        expected = getattr(s1, op)(s2)
+        res = getattr(f1, op)(f2)
+        assert isinstance(res, FrozenItvSet)
+        assert res == expected
+        assert getattr(f1, op)(s2) == expected
+        assert getattr(s1, op)(f2) == expected
+
+
+def test_thaw():
+    s = ItvSet(random_itvs(50, 4))
+    f = s.freeze()
+    t = f.thaw()
+    assert isinstance(t, ItvSet) and t == s
+    t.add(Itv(200, 300))
+    assert 250 not in f and 250 in t
+    assert f.freeze() is f
+
+
+def test_overlapping():
+    s = ItvSet(random_itvs(100, 5, hi=1000))
+    f = s.freeze()
+    for w in random_itvs(50, 6, hi=1000) + [Itv(-inf, inf), Itv(3, 3), Itv.empty_set()]:
+        assert list(f.overlapping(w)) == list(s.overlapping(w))
+        assert list(f.clip(w)) == list(s.clip(w))
+    assert list(f.irange(100, 200, (False, False))) == list(s.irange(100, 200, (False, False)))
+
+
+def test_save_load(tmp_path):
+    path = tmp_path / 'set.icl'
+    cases = [
+        ItvSet(random_itvs(200, 7, hi=2000)),
+        ItvSet([Itv(-inf, -3, '()'), Itv(0.5, 1.5), Itv(10, inf, '(]')]),
+        ItvSet(random_itvs(50, 8) + [Itv(-inf, -3, '()'), Itv(2 ** 60 + 1, inf, '[)')]),
+        ItvSet([Itv(-1, 0.5), Itv(2 ** 60 + 1, 2.0 ** 62)]),
+        ItvSet(),
+    ]
+    for s in cases:
+        s.save(path)
+        for mmap in (True, False):
+            f = FrozenItvSet.load(path, mmap=mmap)
+            assert f == s
+            assert list(f.overlapping(Itv(0, 100))) == list(s.overlapping(Itv(0, 100)))
+            assert [x in f for x in range(-5, 50)] == [x in s for x in range(-5, 50)]
+            t = ItvSet.load(path, mmap=mmap)
+            assert type(t) is type(s)
+            assert t == s
+            t.add(Itv(-2.5, -2))
+            assert t != s
+        f.save(tmp_path / 'copy.icl')
+        assert (tmp_path / 'copy.icl').read_bytes() == path.read_bytes()
+        assert f._arr.a.dtype == s._array().a.dtype and f._arr.b.dtype == s._array().b.dtype
+        assert (2 ** 60 in f) == (2 ** 60 in s) and (2 ** 60 + 1 in f) == (2 ** 60 + 1 in s)
+        assert f.contains_many([2 ** 60, 2 ** 60 + 1]).tolist() == [2 ** 60 in s, 2 ** 60 + 1 in s]
+
+    cases[0].save(path)
+    f = FrozenItvSet.load(path)
+    assert isinstance(f._arr.a, np.memmap)
+    assert not f._arr.a.flags.writeable
+
+    path.write_bytes(b'not a set')
+    with pytest.raises(ValueError):
+        FrozenItvSet.load(path)
+    with pytest.raises(TypeError):
+        ItvSet([Itv('a', 'b')]).save(path)
+    with pytest.raises(TypeError):     # int64转为float64会舍入
+        ItvSet([Itv(0, 0.5), Itv(2 ** 60 + 1, 2 ** 60 + 3)]).save(path)
+
+    # 版本1的文件两列共用一个dtype，无穷端点为float的inf
+    a, b = np.array([-np.inf, 2.0]), np.array([1.0, np.inf])
+    path.write_bytes(_HEADER_V1.pack(b'ICLS', 1, b'<f8', 2) + a.tobytes() + b.tobytes() + bytes([0, 1]))
+    assert FrozenItvSet.load(path) == ItvSet([Itv(-inf, 1), Itv(2, inf, '[)')])
+
+
+def test_gaps():
+    s = ItvSet(random_itvs(100, 8, hi=1000))
+    f = s.freeze()
+    assert list(f.iter_gaps()) == list(s.iter_gaps())
+    for w in random_itvs(30, 9, hi=1000) + [Itv(-inf, inf)]:
+        assert list(f.iter_gaps(w)) == list(s.iter_gaps(w))
+        assert list((-f).overlapping(w)) == list((-s).overlapping(w))
+    assert -f == -s
+    assert (-f) & s == FrozenItvSet()
+    assert f & -s == FrozenItvSet() and type(f & -s) is FrozenItvSet
+    assert isinstance(f | -s, ItvSetComplement) and f | -s == -FrozenItvSet()
+    assert f - -s == f
+
+
+def test_nearest():
+    s = ItvSet(random_itvs(60, 3, hi=500) + [Itv(-inf, -10, '()')])
+    f = s.freeze()
+    for x in [i / 4 for i in range(-80, 2100)]:
+        assert same_itv(f.floor(x), s.floor(x))
+        assert same_itv(f.ceil(x), s.ceil(x))
+        assert same_itv(f.nearest(x), s.nearest(x))
+        assert f.distance(x) == s.distance(x)
+    for w in list(s) + random_itvs(100, 4, hi=500):
+        assert same_itv(f.successor(w), s.successor(w))
+        assert same_itv(f.predecessor(w), s.predecessor(w))
+    assert FrozenItvSet().nearest(0) is None
+    assert FrozenItvSet().distance(0) == inf
+
+
+def test_hash():
+    s = ItvSet(random_itvs(100, 5, hi=1000) + [Itv(-inf, -10, '()')])
+    f1 = s.freeze()
+    f2 = FrozenItvSet(list(s)[::-1])
+    assert f1.fingerprint() == f2.fingerprint() == s.fingerprint()
+    assert hash(f1) == hash(f2)
+    d = {f1: 1}
+    assert d[f2] == 1
+    assert f1 == s and s == f2
+    s.add(Itv(-5, -4))
+    assert f1 != s and s != f1
+    assert s.freeze() not in d
+    assert len({FrozenItvSet(), FrozenItvSet([]), f1, f2, s.freeze()}) == 3
+    with pytest.raises(TypeError):
+        hash(s)
+
+
+def test_pickle(tmp_path):
+    import copy
+
+    s = ItvSet(random_itvs(100, 6, hi=1000) + [Itv(-inf, -10, '()'), Itv(2000, inf)])
+    path = tmp_path / 'set.icl'
+    s.save(path)
+    for f in [s.freeze(), FrozenItvSet(), FrozenItvSet.load(path), s.freeze()[3:10]]:
+        for t in [pickle.loads(pickle.dumps(f)), copy.deepcopy(f)]:
+            assert t == f and hash(t) == hash(f)
+            assert list(t.overlapping(Itv(0, 500))) == list(f.overlapping(Itv(0, 500)))
+            assert not t._arr.a.flags.writeable
+
+
+def test_non_numeric_endpoints():
+    f = FrozenItvSet([Itv('a', 'c'), Itv('x', 'z', '()')])
+    assert f._arr.a.dtype == object
+    assert 'b' in f and 'x' not in f and 'y' in f
+    assert list(f.contains_many(['b', 'x', 'y'])) == [True, False, True]
+    assert hash(f) == hash(FrozenItvSet([Itv('x', 'z', '()'), Itv('a', 'c')]))
+    assert f != FrozenItvSet([Itv('a', 'c')])
+    assert pickle.loads(pickle.dumps(f)) == f
+    assert list(f.iter_gaps(Itv('b', 'y'))) == [Itv('c', 'x', '(]')]
@@ -0,0 +1,96 @@
+import pickle
+
+from icl import *
+from conftest import random_itvs
+
+
+def int_points(s, lo=-5, hi=125):
+    return {x for x in range(lo, hi) if x in s}
+
+
+def test_coalesce_adjacent():
+    s = IntItvSet([Itv(1, 3), Itv(4, 6)])
+    assert list(s) == [Itv(1, 7, '[)')]
+    assert len(s) == 1
+    assert s.measure() == 6
+
+    s = IntItvSet([Itv(1, 3, '()'), Itv(0.5, 1.5), Itv(5, 7, '(]')])
+    assert list(s) == [Itv(1, 3, '[)'), Itv(6, 8, '[)')]
+    assert IntItvSet([Itv(1, 2, '()'), Itv(1.2, 1.8)]).empty()
+    assert 2 in s and 3 not in s and 0 not in s
+
+
+def test_add_remove():
+    s = IntItvSet()
+    expected = set()
+    for i, v in enumerate(random_itvs(300, 1)):
+        pts = {x for x in range(-5, 125) if x in v}
+        if i % 3:
+            s.add(v)
+            expected |= pts
+        else:
+            s.remove(v)
+            expected -= pts
+        assert int_points(s) == expected
+        itvs = list(s)
+        for v1, v2 in zip(itvs, itvs[1:]):
+            assert v1.b < v2.a
+    assert s.measure() == len(expected)
+
+    t = s.copy()
+    t.add_many(random_itvs(50, 2))
+    t.remove_many(random_itvs(50, 3))
+    u = s.copy()
+    for v in random_itvs(50, 2):
+        u.add(v)
+    for v in random_itvs(50, 3):
+        u.remove(v)
+    assert t == u
+    assert s != t
+
+
+def test_binary_ops():
+    for seed in range(20):
+        s1 = IntItvSet(random_itvs(20, seed))
+        s2 = IntItvSet(random_itvs(20, seed + 100))
+        p1, p2 = int_points(s1), int_points(s2)
+        assert int_points(s1 & s2) == p1 & p2
+        assert int_points(s1 | s2) == p1 | p2
+        assert int_points(s1 - s2) == p1 - p2
+        assert int_points(s1 ^ s2) == p1 ^ p2
+        assert s1 | random_itvs(20, seed + 100) == s1 | s2
+        s3 = s1.copy()
+        s3 ^= s2
+        assert s3 == s1 ^ s2
+
+
+def test_inf_and_numpy():
+    import numpy as np
+
+    s = IntItvSet([Itv(-inf, -10, '()'), Itv(0, 5), Itv(100, inf, '(]')])
+    assert list(s) == [Itv(-inf, -10, '()'), Itv(0, 6, '[)'), Itv(101, inf, '[)')]
+    assert -(1 << 62) in s and (1 << 62) in s and 100 not in s
+    assert -s == IntItvSet([Itv(-10, 0, '[)'), Itv(6, 100)])
+
+    points = np.arange(-20, 120)
+    assert s.contains_many(points).tolist() == [int(x) in s for x in points]
+    assert not IntItvSet().contains_many([1, 2]).any()
+    assert pickle.loads(pickle.dumps(s)) == s
+
+
+def test_out_of_range():
+    # 超出int64范围的端点视为无穷
+    assert IntItvSet([Itv(0, 1e20)]) == IntItvSet([Itv(0, inf)])
+    assert IntItvSet([Itv(0, 2 ** 63 - 1)]) == IntItvSet([Itv(0, inf)])
+    assert IntItvSet([Itv(-2 ** 70, 3)]) == IntItvSet([Itv(-inf, 3)])
+    assert IntItvSet([Itv(0, 2 ** 62)]).measure() == 2 ** 62 + 1
+    assert IntItvSet([Itv(inf, inf), Itv(-inf, -inf), Itv(2 ** 64, 2 ** 65)]).empty()
+    s = IntItvSet()
+    s.add(Itv(inf, inf))
+    s.remove(Itv(-inf, -inf))
+    assert s.empty()
+
+    assert IntItvSet([Itv(-inf, 3)]).measure() == inf
+    assert IntItvSet([Itv(0, 3), Itv(5, inf)]).measure() == inf
+    assert IntItvSet().measure() == 0
+    assert (-IntItvSet([Itv(-inf, 3), Itv(10, inf)])).measure() == 6